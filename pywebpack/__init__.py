@@ -61,6 +61,34 @@ entry points::
 Alternatively, :meth:`~pywebpack.project.WebpackProject.buildall` can be used
 to execute both tasks at once.
 
+To deploy a build without exposing partially written files, the build output
+can be published into a new version directory, which replaces the previous one
+atomically once all the files referenced by the manifest are verified::
+
+    project.publish('dist', '/srv/static', public_path='/static/', keep=3)
+
+Files and manifest are then served from ``/srv/static/current``.
+
+Web servers can serve precompressed assets (e.g. nginx's ``gzip_static``). They
+are generated in parallel, for the files of the manifest which changed since
+the last run, by :func:`~pywebpack.compression.precompress` (brotli requires
+the ``brotli`` extra)::
+
+    precompress('dist', public_path='/static/')
+
+The sizes of the files are recorded next to the manifest, and set as entry
+metadata when the manifest is loaded with ``ManifestLoader(sizes=True)``::
+
+    manifest['main.js'].metadata['gzip']
+
+To catch size regressions (e.g. in CI), bundles and projects can declare
+performance budgets per manifest entry, either as a maximum raw size or per
+metric. After the build, the transfer size of each entry (its files and
+imports, raw and compressed) is compared to its budget::
+
+    bundle = WebpackBundle(..., budgets={'main.js': {'size': 300000, 'gzip': 80000}})
+    project.check_budgets('dist')  # raises BudgetExceededError with a report
+
 Build time config
 -----------------
 
@@ -197,6 +225,12 @@ defined multiple times with different versions, only the highest version that
 satisfies all of them is kept. For more information, see the documentation of
 `node-semver`_.
 
+Alternatively, with ``intersect_dependencies=True`` the versions are handled as
+npm ranges (e.g. ``^1.2``, ``>=1.0 <2`` or ``1.x || 2.x``), and the narrowest
+range satisfying all bundles is kept. Unsatisfiable combinations are then
+reported as a :class:`~pywebpack.errors.MergeConflictError` before ``npm`` is
+run.
+
 Extension points
 ----------------
 
@@ -245,6 +279,28 @@ installed and exposed bundles::
 When executing ``project.buildall()``, the bundles exposed as entry points will
 be collected and built.
 
+Loading the bundles this way imports every module exposing them. Bundles can
+instead be declared in a JSON (or, on Python 3.11+, TOML) file shipped as
+package data, e.g. ``mymodule/webpack.json``::
+
+    {
+      "path": "static",
+      "entry": {
+        "mymodule-styles": "./js/mymodule/styles.css"
+      },
+      "dependencies": {
+        "bootstrap-sass": "~3.3.5"
+      }
+    }
+
+The file holds the arguments of :class:`~pywebpack.bundle.WebpackBundle`,
+with ``path`` relative to the file. It is exposed by naming it in the entry
+point, and is read without importing ``mymodule``::
+
+    'webpack_bundles': [
+        'mymodule = mymodule:webpack.json',
+    ],
+
 Manifest
 --------
 
@@ -259,7 +315,9 @@ the name of a resource and its "hashed" version::
 
 Pywebpack can parse a manifest file and make it available to your Python
 project. It supports manifest files generated using `webpack-manifest-plugin`_,
-`webpack-yam-plugin`_ and `webpack-bundle-tracker`_.
+`webpack-yam-plugin`_, `webpack-bundle-tracker`_, `webpack-assets-manifest`_
+(with its ``entrypoints`` option) and `Vite`_ (with its ``build.manifest``
+option).
 
 You will normally want webpack to add a hash of a file's contents to its name::
 
@@ -287,6 +345,80 @@ The manifest entries can be retrieved as object attributes or items::
     manifest['main.js']
     manifest['myresource']
 
+Several entries used by a page can be rendered at once, so that chunks shared
+between them are only included once, and their files can be preloaded with
+HTML tags or an HTTP ``Link`` header (e.g. for ``103 Early Hints``)::
+
+    manifest.render_entries(['main.js', 'admin.js'])
+    manifest.preload_links(['main.js', 'main.css'])
+    manifest.link_header(['main.js', 'main.css'])
+
+Entries of Vite manifests are rendered as module scripts, followed by
+``modulepreload`` links for all the chunks they import, directly or not, so
+that browsers fetch them in parallel::
+
+    manifest['src/main.js'].render()
+
+When a modern (e.g. ES2020) and a legacy build of the same entries are
+shipped, their manifests can be loaded together. Each browser then only loads
+one of the builds, thanks to ``type="module"`` and ``nomodule`` script pairs,
+with optional ``defer``/``async`` attributes per entry (``*`` applies to all
+the other entries)::
+
+    manifest = loader.load_variants(
+        '/path/to/dist/modern/manifest.json',
+        '/path/to/dist/legacy/manifest.json',
+        attrs={'main.js': ['async'], '*': ['defer']},
+    )
+
+Small scripts and stylesheets (e.g. critical CSS) can be inlined in the HTML
+to save requests. An :class:`~pywebpack.manifests.InlinePolicy` reads them from
+the output directory, once per version of the file::
+
+    inline = InlinePolicy('/path/to/dist', max_size=4096, include=['critical.css'])
+    manifest['main.css'].render(inline=inline)
+    manifest.render_entries(['main.js', 'main.css'], inline=inline)
+
+When the manifest is looked up on every request, use a
+:class:`~pywebpack.manifests.CachedManifestLoader` instead. It keeps the
+parsed manifest in memory and only reloads it when the file was replaced::
+
+    loader = CachedManifestLoader(check_interval=1)
+    manifest = loader.load('/path/to/dist/manifest.json')
+
+A worker may start while webpack is still writing the manifest. Loading it
+then raises :class:`~pywebpack.manifests.UnfinishedManifestError`, unless it
+waits for the build to complete (using inotify where available)::
+
+    manifest = wait_for_manifest('/path/to/dist/manifest.json', timeout=60)
+    manifest = await wait_for_manifest_async('/path/to/dist/manifest.json')
+    loader = CachedManifestLoader(wait_timeout=60)
+
+With a pre-forking server (e.g. gunicorn with ``preload_app``), load the
+manifests in the parent process before the workers are forked, so that they
+share the same memory pages instead of each holding a copy::
+
+    loader.preload('/path/to/dist/manifest.json')
+
+To avoid parsing the JSON manifest at all when workers start, it can be
+compiled at build time into a binary file, which is then memory-mapped by
+:class:`~pywebpack.manifests.CompiledManifestLoader`. The JSON manifest is
+used instead if the compiled one is missing or outdated::
+
+    compile_manifest('/path/to/dist/manifest.json')
+    manifest = CompiledManifestLoader().load('/path/to/dist/manifest.json')
+
+Assets of several independent builds can be looked up together with a
+:class:`~pywebpack.manifests.ManifestSet`, optionally namespacing the entries
+of some of them::
+
+    manifests = ManifestSet([
+        '/path/to/dist/manifest.json',
+        ('admin', '/path/to/admin/dist/manifest.json'),
+    ])
+    manifests['main.js']
+    manifests['admin:main.js']
+
 .. _webpack entry: https://webpack.js.org/concepts/#entry
 .. _node-semver: https://pypi.org/project/node-semver/
 .. _webpack-manifest-plugin:
@@ -295,42 +427,107 @@ The manifest entries can be retrieved as object attributes or items::
         https://www.npmjs.com/package/webpack-yam-plugin
 .. _webpack-bundle-tracker:
         https://www.npmjs.com/package/webpack-bundle-tracker
+.. _webpack-assets-manifest:
+        https://www.npmjs.com/package/webpack-assets-manifest
+.. _Vite: https://vitejs.dev/guide/backend-integration
 
 """
 
-from .bundle import WebpackBundle
-from .helpers import bundles_from_entry_point
-from .manifests import (
-    InvalidManifestError,
-    Manifest,
-    ManifestEntry,
-    ManifestError,
-    ManifestLoader,
-    UnfinishedManifestError,
-    UnsupportedExtensionError,
-    UnsupportedManifestError,
-    WebpackBundleTrackerFactory,
-    WebpackManifestFactory,
-    WebpackYamFactory,
+# Public names, by module. They are imported on first access, so that using
+# the manifests (e.g. in web workers) does not import the build machinery.
+_exports = {
+    "bundle": ["WebpackBundle"],
+    "compression": ["precompress"],
+    "helpers": ["bundles_from_entry_point"],
+    "manifests": [
+        "CachedManifestLoader",
+        "CompiledManifest",
+        "CompiledManifestLoader",
+        "InlinePolicy",
+        "InvalidManifestError",
+        "Manifest",
+        "ManifestConflictError",
+        "ManifestEntry",
+        "ManifestError",
+        "ManifestLoader",
+        "ManifestSet",
+        "ManifestTimeoutError",
+        "UnfinishedManifestError",
+        "UnsupportedExtensionError",
+        "UnsupportedManifestError",
+        "ViteManifestFactory",
+        "WebpackAssetsManifestFactory",
+        "WebpackBundleTrackerFactory",
+        "WebpackManifestFactory",
+        "WebpackYamFactory",
+        "compile_manifest",
+        "wait_for_manifest",
+        "wait_for_manifest_async",
+    ],
+    "project": ["WebpackBundleProject", "WebpackProject", "WebpackTemplateProject"],
+    "storage": ["FileStorage", "LinkStorage", "ParallelFileStorage"],
+}
+_modules = {name: module for module, names in _exports.items() for name in names}
+_submodules = (
+    "budgets",
+    "bundle",
+    "compression",
+    "errors",
+    "helpers",
+    "manifests",
+    "project",
+    "semver",
+    "storage",
 )
-from .project import WebpackBundleProject, WebpackProject, WebpackTemplateProject
-from .storage import FileStorage, LinkStorage
+
+
+def __getattr__(name):
+    """Import a public name or a submodule on first access."""
+    if name in _submodules:
+        import importlib
+
+        return importlib.import_module(f"{__name__}.{name}")
+    module = _modules.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Unlike importlib, __import__ shows up in `python -X importtime`.
+    value = getattr(__import__(f"{__name__}.{module}", fromlist=[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List the module attributes, including the not yet imported ones."""
+    return sorted(set(globals()) | set(_modules) | set(_submodules))
+
 
 __version__ = "2.2.1"
 
 __all__ = (
     "__version__",
     "bundles_from_entry_point",
+    "CachedManifestLoader",
+    "compile_manifest",
+    "CompiledManifest",
+    "CompiledManifestLoader",
     "FileStorage",
+    "InlinePolicy",
     "InvalidManifestError",
     "LinkStorage",
     "Manifest",
     "ManifestEntry",
+    "ManifestConflictError",
     "ManifestError",
     "ManifestLoader",
+    "ManifestSet",
+    "ManifestTimeoutError",
+    "ParallelFileStorage",
+    "precompress",
     "UnfinishedManifestError",
     "UnsupportedExtensionError",
     "UnsupportedManifestError",
+    "ViteManifestFactory",
+    "WebpackAssetsManifestFactory",
     "WebpackBundle",
     "WebpackBundleProject",
     "WebpackBundleTrackerFactory",
@@ -338,4 +535,6 @@ __all__ = (
     "WebpackProject",
     "WebpackTemplateProject",
     "WebpackYamFactory",
+    "wait_for_manifest",
+    "wait_for_manifest_async",
 )
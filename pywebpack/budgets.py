@@ -0,0 +1,212 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Performance budgets of the built entries."""
+
+import errno
+import os
+from itertools import chain
+from os.path import join
+
+from .compression import COMPRESSORS, check_formats
+from .manifests import ManifestLoader, asset_path
+
+
+def _file_sizes(filepath, formats):
+    """Get the size of a file, raw and compressed in several formats.
+
+    Precompressed files (see :func:`pywebpack.compression.precompress`) are
+    used if they are up to date. Otherwise, the file is compressed in memory.
+    """
+    st = os.stat(filepath)
+    sizes = {"size": st.st_size}
+    data = None
+    for f in formats:
+        suffix, compress = COMPRESSORS[f]
+        try:
+            compressed = os.stat(filepath + suffix)
+            if compressed.st_mtime_ns >= st.st_mtime_ns:
+                sizes[f] = compressed.st_size
+                continue
+        except FileNotFoundError:
+            pass
+        if data is None:
+            with open(filepath, "rb") as fp:
+                data = fp.read()
+        sizes[f] = len(compress(data))
+    return sizes
+
+
+def _entry_sizes(output_dir, manifest, formats, public_path, loader, names):
+    """Compute the transfer size of entries of a manifest.
+
+    :return: Tuple of the sizes per entry name, and of the paths of the
+        missing files per entry name. Entries with missing files have no
+        sizes.
+    """
+    check_formats(formats)
+    files = {}
+    sizes, missing = {}, {}
+    for entry in (loader or ManifestLoader()).load(join(output_dir, manifest)):
+        if names is not None and entry.name not in names:
+            continue
+        totals = dict.fromkeys(["size"] + list(formats), 0)
+        for path in dict.fromkeys(chain(entry, entry.imports)):
+            if path not in files:
+                filepath = join(output_dir, asset_path(path, public_path))
+                try:
+                    files[path] = _file_sizes(filepath, formats)
+                except FileNotFoundError:
+                    files[path] = None
+            if files[path] is None:
+                missing.setdefault(entry.name, []).append(path)
+                continue
+            for key, size in files[path].items():
+                totals[key] += size
+        if entry.name not in missing:
+            sizes[entry.name] = totals
+    return sizes, missing
+
+
+def entry_sizes(
+    output_dir,
+    manifest="manifest.json",
+    formats=("gzip",),
+    public_path=None,
+    loader=None,
+    names=None,
+):
+    """Compute the transfer size of each entry of a manifest.
+
+    The transfer size of an entry is the total size of its files and of the
+    chunks it imports, raw and compressed.
+
+    :param output_dir: Output directory of webpack.
+    :param manifest: Path of the manifest, relative to ``output_dir``.
+    :param formats: Compression formats to compute the size of (see
+        :data:`pywebpack.compression.COMPRESSORS`).
+    :param public_path: Prefix of the paths in the manifest (see
+        :func:`~pywebpack.manifests.asset_path`).
+    :param loader: :class:`~pywebpack.manifests.ManifestLoader` used to load
+        the manifest.
+    :param names: Names of the entries to compute the size of (default: all
+        the entries).
+    :return: Dictionary of entry name to sizes, e.g.
+        ``{"main.js": {"size": 1024, "gzip": 512}}``.
+    :raises FileNotFoundError: If a file of an entry does not exist.
+    """
+    sizes, missing = _entry_sizes(
+        output_dir, manifest, formats, public_path, loader, names
+    )
+    if missing:
+        path = next(iter(missing.values()))[0]
+        filepath = join(output_dir, asset_path(path, public_path))
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), filepath)
+    return sizes
+
+
+class BudgetResult(object):
+    """Size of an entry compared to its budget."""
+
+    def __init__(self, entry, metric, size, budget):
+        """Initialize result.
+
+        :param entry: Name of the entry.
+        :param metric: ``size`` for the raw size, or a compression format.
+        :param size: Size of the entry, in bytes.
+        :param budget: Maximum size of the entry, in bytes.
+        """
+        self.entry = entry
+        self.metric = metric
+        self.size = size
+        self.budget = budget
+
+    @property
+    def exceeded(self):
+        """Check if the entry exceeds its budget."""
+        return self.size > self.budget
+
+    def __str__(self):
+        """Describe the result."""
+        status = "EXCEEDED" if self.exceeded else "ok"
+        usage = self.size * 100 // self.budget if self.budget else 0
+        return (
+            f"{self.entry} ({self.metric}): {self.size} / {self.budget} bytes "
+            f"({usage}%) {status}"
+        )
+
+
+class BudgetReport(object):
+    """Report of a performance budgets check."""
+
+    def __init__(self, results, missing=None, missing_files=None):
+        """Initialize report.
+
+        :param results: List of :class:`BudgetResult`.
+        :param missing: Names of the entries with a budget which are not in
+            the manifest.
+        :param missing_files: Paths of the files which do not exist, by name
+            of the entry with a budget listing them.
+        """
+        self.results = results
+        self.missing = missing or []
+        self.missing_files = missing_files or {}
+
+    @property
+    def violations(self):
+        """Results exceeding their budget."""
+        return [r for r in self.results if r.exceeded]
+
+    @property
+    def ok(self):
+        """Check if all the entries exist and are within their budgets."""
+        return not self.violations and not self.missing_files
+
+    def __str__(self):
+        """Per-entry report."""
+        lines = [str(r) for r in self.results]
+        lines += [
+            f"{name}: missing file {path}"
+            for name, paths in sorted(self.missing_files.items())
+            for path in paths
+        ]
+        lines += [f"{name}: not found in the manifest" for name in self.missing]
+        return "\n".join(lines)
+
+
+def check_budgets(
+    budgets, output_dir, manifest="manifest.json", public_path=None, loader=None
+):
+    """Compare the transfer size of built entries to their budgets.
+
+    :param budgets: Dictionary of manifest entry name to budget. A budget is
+        either the maximum raw size in bytes, or a dictionary of maximum sizes
+        per metric, e.g. ``{"size": 200000, "gzip": 50000}``.
+    :param output_dir: Output directory of webpack.
+    :param manifest: Path of the manifest, relative to ``output_dir``.
+    :param public_path: Prefix of the paths in the manifest (see
+        :func:`~pywebpack.manifests.asset_path`).
+    :param loader: :class:`~pywebpack.manifests.ManifestLoader` used to load
+        the manifest.
+    :return: A :class:`BudgetReport`. Entries listing files which do not
+        exist fail the check.
+    """
+    budgets = {
+        name: budget if isinstance(budget, dict) else {"size": budget}
+        for name, budget in budgets.items()
+    }
+    formats = sorted({m for b in budgets.values() for m in b if m != "size"})
+    # Only the entries with a budget are measured.
+    sizes, missing_files = _entry_sizes(
+        output_dir, manifest, formats, public_path, loader, budgets
+    )
+
+    results, missing = [], []
+    for name, budget in sorted(budgets.items()):
+        if name not in sizes:
+            if name not in missing_files:
+                missing.append(name)
+            continue
+        for metric, limit in budget.items():
+            results.append(BudgetResult(name, metric, sizes[name][metric], limit))
+    return BudgetReport(results, missing, missing_files)
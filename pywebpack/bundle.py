@@ -16,6 +16,7 @@ class WebpackBundle(object):
         peerDependencies=None,
         aliases=None,
         copy=None,
+        budgets=None,
     ):
         """Initialize webpack bundle.
 
@@ -30,6 +31,8 @@ class WebpackBundle(object):
         :param copy: List of copy instructions of the shape
             ``{"from": "source_path", "to": "dest_path"}`` for copying assets.
             Paths are relative to the directory of the resulting config.
+        :param budgets: Performance budgets of the built entries, by manifest
+            entry name (see :func:`pywebpack.budgets.check_budgets`).
         """
         self.path = path
         self.entry = entry or {}
@@ -40,3 +43,4 @@ class WebpackBundle(object):
         }
         self.aliases = aliases or {}
         self.copy = copy or []
+        self.budgets = budgets or {}
@@ -0,0 +1,155 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Precompression of the built assets."""
+
+import gzip
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from os.path import exists, join, splitext
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+from .manifests import SIZES_SUFFIX, ManifestLoader, asset_path
+
+
+def _gzip(data):
+    """Compress data with gzip (reproducible output)."""
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data):
+    """Compress data with brotli."""
+    return brotli.compress(data, quality=11)
+
+
+#: Compression formats: name -> (file suffix, compression function).
+COMPRESSORS = {
+    "gzip": (".gz", _gzip),
+    "br": (".br", _brotli),
+}
+
+#: Extensions of the files compressed by default.
+COMPRESSED_EXTENSIONS = (".js", ".mjs", ".css", ".svg")
+
+
+def available_formats():
+    """Get the compression formats supported by the installed libraries."""
+    return [f for f in COMPRESSORS if f != "br" or brotli is not None]
+
+
+def check_formats(formats):
+    """Check that compression formats are supported.
+
+    :raises ValueError: If a format is unknown.
+    :raises RuntimeError: If the library of a format is not installed.
+    """
+    for f in formats:
+        if f not in COMPRESSORS:
+            raise ValueError(f"Unsupported compression format: {f}")
+        if f == "br" and brotli is None:
+            raise RuntimeError("The brotli package is required for brotli.")
+
+
+def _compress_file(filepath, formats, previous=None):
+    """Compress a file in several formats, unless it is unchanged.
+
+    :param previous: Sizes recorded for the file by the previous run.
+    :return: Dictionary with the file digest, and the sizes of the file and
+        of each compressed file.
+    """
+    with open(filepath, "rb") as fp:
+        data = fp.read()
+    digest = hashlib.sha1(data).hexdigest()
+    if (
+        previous
+        and previous.get("digest") == digest
+        and all(f in previous and exists(filepath + COMPRESSORS[f][0]) for f in formats)
+    ):
+        return previous
+
+    sizes = {"digest": digest, "size": len(data)}
+    for f in formats:
+        suffix, compress = COMPRESSORS[f]
+        compressed = compress(data)
+        tmp_path = filepath + suffix + ".tmp"
+        with open(tmp_path, "wb") as fp:
+            fp.write(compressed)
+        os.replace(tmp_path, filepath + suffix)
+        sizes[f] = len(compressed)
+    return sizes
+
+
+def precompress(
+    output_dir,
+    manifest="manifest.json",
+    formats=None,
+    extensions=COMPRESSED_EXTENSIONS,
+    public_path=None,
+    max_workers=None,
+    loader=None,
+):
+    """Precompress the files of a manifest, next to them.
+
+    Each file referenced by the manifest (entries and their imports) with one
+    of the given extensions is compressed into a ``.gz`` and/or ``.br`` file,
+    as served by e.g. nginx's ``gzip_static``/``brotli_static``. Files are
+    compressed in parallel threads (the compression libraries release the
+    GIL, so all cores are used).
+
+    The digest and sizes of the files are recorded next to the manifest (see
+    :data:`~pywebpack.manifests.SIZES_SUFFIX`), so that the files which did not
+    change are skipped on the next run, and the sizes can be set as entry
+    metadata by a :class:`~pywebpack.manifests.ManifestLoader` with
+    ``sizes=True``. Run it before the manifest is served, e.g. before
+    :meth:`~pywebpack.project.WebpackProject.publish`.
+
+    :param output_dir: Output directory of webpack.
+    :param manifest: Path of the manifest, relative to ``output_dir``.
+    :param formats: Compression formats (see :data:`COMPRESSORS`). Defaults
+        to all the formats available (brotli requires the `brotli` package).
+    :param extensions: Extensions of the files to compress.
+    :param public_path: Prefix of the paths in the manifest (see
+        :func:`~pywebpack.manifests.asset_path`).
+    :param max_workers: Number of threads (defaults to the number of CPUs).
+    :param loader: :class:`~pywebpack.manifests.ManifestLoader` used to load
+        the manifest.
+    :return: Dictionary of manifest path to recorded sizes.
+    """
+    formats = available_formats() if formats is None else list(formats)
+    check_formats(formats)
+
+    manifest_path = join(output_dir, manifest)
+    sizes_path = manifest_path + SIZES_SUFFIX
+    previous = {}
+    if exists(sizes_path):
+        with open(sizes_path) as fp:
+            previous = json.load(fp)["files"]
+
+    paths = list(
+        dict.fromkeys(
+            p
+            for entry in (loader or ManifestLoader()).load(manifest_path)
+            for p in chain(entry, entry.imports)
+            if splitext(p)[1].lower() in extensions
+        )
+    )
+
+    def compress(path):
+        filepath = join(output_dir, asset_path(path, public_path))
+        return _compress_file(filepath, formats, previous.get(path))
+
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        files = dict(zip(paths, executor.map(compress, paths)))
+
+    tmp_path = sizes_path + ".tmp"
+    with open(tmp_path, "w") as fp:
+        json.dump({"formats": formats, "files": files}, fp, indent=2, sort_keys=True)
+    os.replace(tmp_path, sizes_path)
+    return files
@@ -10,3 +10,26 @@ class PyWebpackException(Exception):
 
 class MergeConflictError(PyWebpackException):
     """Base exception for PyWebpack errors."""
+
+    def __init__(self, message, conflicts=None):
+        """Initialize exception.
+
+        :param message: Error message.
+        :param conflicts: List of
+            :class:`~pywebpack.helpers.DependencyConflict` (if known).
+        """
+        super(MergeConflictError, self).__init__(message)
+        self.conflicts = conflicts or []
+
+
+class BudgetExceededError(PyWebpackException):
+    """Built entries exceed their performance budgets."""
+
+    def __init__(self, message, report=None):
+        """Initialize exception.
+
+        :param message: Error message.
+        :param report: :class:`~pywebpack.budgets.BudgetReport` of the check.
+        """
+        super(BudgetExceededError, self).__init__(message)
+        self.report = report
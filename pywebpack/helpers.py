@@ -4,28 +4,112 @@
 
 """Webpack bundle API."""
 
+import hashlib
 import importlib.metadata as m
-import re
+import json
+import os
+import sys
+import tempfile
 from functools import wraps
 from sys import version_info
 
+from pywebpack.bundle import WebpackBundle
 from pywebpack.errors import MergeConflictError
 
-# https://semver.org/#is-there-a-suggested-regular-expression-regex-to-check-a-semver-string
-# Differences:
-# - `^\D*`: ignores the first not numberic char (major version), e.g. ~ or <
-# - minor and patch versions are optional
-SEM_VER = r"^\D*(?P<major>0|[1-9]\d*)\.?(?P<minor>0|[1-9]\d*)?\.?(?P<patch>0|[1-9]\d*)?(?:-(?P<prerelease>(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?(?:\+(?P<buildmetadata>[0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$"
+# SEM_VER is kept importable from here for backwards compatibility.
+from pywebpack.semver import (  # noqa: F401
+    SEM_VER,
+    intersect_ranges,
+    max_versions,
+    parse_version,
+)
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover
+    tomllib = None
+
+#: Extensions of declarative bundle files.
+BUNDLE_FILE_EXTENSIONS = (".json", ".toml")
+
+
+def _find_spec(name, search_locations):
+    """Find the spec of a module with the meta path finders.
+
+    Unlike :func:`importlib.util.find_spec`, the parent packages are not
+    imported. All the meta path finders are tried (not only the path based
+    one), so that e.g. packages installed in editable mode are found.
+    """
+    for finder in sys.meta_path:
+        find_spec = getattr(finder, "find_spec", None)
+        if find_spec is None:
+            continue
+        spec = find_spec(name, search_locations)
+        if spec is not None:
+            return spec
+    return None
+
+
+def _find_package_file(module, filename):
+    """Locate a file inside a package without importing the package."""
+    spec = None
+    search_locations = None
+    parts = module.split(".")
+    for i in range(len(parts)):
+        name = ".".join(parts[: i + 1])
+        spec = _find_spec(name, search_locations)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+        search_locations = spec.submodule_search_locations
+
+    if search_locations:
+        base_path = list(search_locations)[0]
+    else:
+        base_path = os.path.dirname(spec.origin)
+    return os.path.join(base_path, filename)
+
+
+def bundle_from_file(filepath):
+    """Create a bundle from a declarative JSON or TOML file.
+
+    The file holds the keyword arguments of
+    :class:`~pywebpack.bundle.WebpackBundle`. The optional ``path`` is
+    relative to the directory of the file, and defaults to it.
+    """
+    if filepath.endswith(".toml"):
+        if tomllib is None:
+            raise RuntimeError("Reading TOML bundle files requires Python 3.11+.")
+        with open(filepath, "rb") as fp:
+            data = tomllib.load(fp)
+    else:
+        with open(filepath) as fp:
+            data = json.load(fp)
+
+    path = os.path.join(os.path.dirname(filepath), data.pop("path", "."))
+    return WebpackBundle(os.path.normpath(path), **data)
 
 
 def _load_ep(ep):
+    # Declarative bundles (e.g. ``mymodule:webpack.json``) are read from the
+    # package data without importing the package.
+    if ep.attr and ep.attr.endswith(BUNDLE_FILE_EXTENSIONS):
+        return bundle_from_file(_find_package_file(ep.module, ep.attr))
     mod = ep.load()
     return mod() if callable(mod) else mod
 
 
-def bundles_from_entry_point(group):
-    """Load bundles from entry point group."""
-    return (_load_ep(ep) for ep in entry_points(group=group))
+def bundles_from_entry_point(group, cache_dir=None):
+    """Load bundles from entry point group.
+
+    :param group: Entry point group name.
+    :param cache_dir: If provided, the entry point lookup is cached on disk in
+        this directory (see :func:`cached_entry_points`).
+    """
+    if cache_dir is None:
+        eps = entry_points(group=group)
+    else:
+        eps = cached_entry_points(group, cache_dir)
+    return (_load_ep(ep) for ep in eps)
 
 
 def cached(f):
@@ -41,6 +125,17 @@ def cached(f):
     return inner
 
 
+def content_hash(data):
+    """Compute a stable hash of JSON-serializable data.
+
+    Keys are sorted so that two equal mappings always produce the same hash.
+    Values that are not JSON-serializable (e.g. a ``LocalProxy``) are hashed
+    through their string representation.
+    """
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
 def check_exit(f):
     """Decorator to ensure that an NPM process exited successfully."""
 
@@ -56,14 +151,8 @@ def check_exit(f):
 
 def _parse_version(version):
     """Parse semantic version."""
-    match = re.match(SEM_VER, version)
-    if not match:
-        raise ValueError(f"{version} is not a valid semantic version.")
-    major = match.group("major")
-    minor = match.group("minor") or 0
-    patch = match.group("patch") or 0
-    prerelease = match.group("prerelease") or ""
-    return int(major), int(minor), int(patch), prerelease
+    v = parse_version(version)
+    return v.major, v.minor, v.patch, v.prerelease
 
 
 def max_version(v1, v2):
@@ -71,48 +160,38 @@ def max_version(v1, v2):
 
     Complies with specification: <https://semver.org/#spec-item-11>.
     """
-    v1_maj, v1_min, v1_patch, v1_pre = _parse_version(v1)
-    v2_maj, v2_min, v2_patch, v2_pre = _parse_version(v2)
-
-    if v1_maj == v2_maj:
-        if v1_min == v2_min:
-            if v1_patch == v2_patch:
-                if v1_pre and v2_pre:
-                    # check pre-release
-                    v1_pre_tags = v1_pre.split(".")
-                    v2_pre_tags = v2_pre.split(".")
-                    # zip creates pairs for shortest list
-                    for v1_pre_tag, v2_pre_tag in zip(v1_pre_tags, v2_pre_tags):
-                        if v1_pre_tag == v2_pre_tag:
-                            continue
-                        if v1_pre_tag.isdigit() and v2_pre_tag.isdigit():
-                            _max = max(int(v1_pre_tag), int(v2_pre_tag))
-                        else:
-                            _max = max(v1_pre_tag, v2_pre_tag)
-                        return v1 if _max == v1_pre_tag else v2
-                    # lists have different lengths: return the longest
-                    return v1 if len(v1_pre_tags) > len(v2_pre_tags) else v2
-                elif v1_pre and not v2_pre:
-                    return v2
-                elif v2_pre and not v1_pre:
-                    return v1
-                # identical: no pre-release, return any (the first)
-                return v1
-            # return higher patch
-            return v1 if v1_patch > v2_patch else v2
-        # return higher minor
-        return v1 if v1_min > v2_min else v2
-    # return higher major
-    return v1 if v1_maj > v2_maj else v2
-
-
-def merge_deps(computed_deps, incoming_deps):
+    return max_versions((v1, v2))
+
+
+def _intersect_versions(pkg, computed_version, incoming_version):
+    """Intersect two version ranges of a package."""
+    if computed_version == incoming_version:
+        return computed_version
+    try:
+        merged = intersect_ranges([computed_version, incoming_version])
+    except ValueError:
+        # Not a range (e.g. ``npm:pkg@^1`` or ``workspace:*``).
+        merged = None
+    if merged is None:
+        raise MergeConflictError(
+            f"No version of package {pkg} satisfies both the current version {computed_version} and the incoming version {incoming_version}"
+        )
+    return merged
+
+
+def merge_deps(computed_deps, incoming_deps, intersect=False):
     """Merge NPM dependencies.
 
+    By default, the highest version is kept if both versions have the same
+    major version. With ``intersect``, versions are handled as npm ranges, and
+    the narrowest range satisfying both of them is kept.
+
     :param computed_deps: dict with all computed deps,
         after merging incoming deps into it.
     :param incoming_deps: new incoming deps to be merged
         into `computed_deps`.
+    :param intersect: Intersect the version ranges instead of keeping the
+        highest version.
     :return: the computed_deps dict with merged `incoming_deps` into it.
     :raise: raises the MergeConflictError exception when deps
         cannot be merged.
@@ -127,20 +206,160 @@ def merge_deps(computed_deps, incoming_deps):
                 if incoming_pkg in computed:
                     computed_version = computed[incoming_pkg]
 
-                    v_maj, _, _, _ = _parse_version(incoming_version)
-                    tv_maj, _, _, _ = _parse_version(computed_version)
-                    if v_maj != tv_maj:
+                    if intersect:
+                        computed[incoming_pkg] = _intersect_versions(
+                            incoming_pkg, computed_version, incoming_version
+                        )
+                        continue
+
+                    v = parse_version(incoming_version)
+                    tv = parse_version(computed_version)
+                    if v.major != tv.major:
                         raise MergeConflictError(
                             f"Incompatible major versions for package {incoming_pkg}: current version is {computed_version}, incoming version is {incoming_version}"
                         )
 
-                    _max = max_version(incoming_version, computed_version)
-                    computed[incoming_pkg] = _max
+                    if v > tv:
+                        computed[incoming_pkg] = incoming_version
                 else:
                     computed[incoming_pkg] = incoming_version
     return computed_deps
 
 
+class DependencyConflict(object):
+    """Conflicting declarations of the same npm package."""
+
+    def __init__(self, dep_type, package, declarations):
+        """Initialize conflict.
+
+        :param dep_type: Dependency type, e.g. ``dependencies``.
+        :param package: Name of the npm package.
+        :param declarations: List of ``(source, version)`` tuples, where the
+            source is e.g. the path of the declaring bundle.
+        """
+        self.dep_type = dep_type
+        self.package = package
+        self.declarations = declarations
+
+    def __str__(self):
+        """Describe the conflict."""
+        declared = ", ".join(f"{v} in {source}" for source, v in self.declarations)
+        return f"Incompatible versions for package {self.package} ({self.dep_type}): {declared}"
+
+
+def _resolve_versions(versions, intersect=False):
+    """Resolve all the declared versions of a package.
+
+    :return: The resolved version, or ``None`` if they conflict.
+    """
+    unique = list(dict.fromkeys(versions))
+    if len(unique) == 1:
+        return unique[0]
+    if intersect:
+        return intersect_ranges(unique)
+    if len({parse_version(v).major for v in unique}) > 1:
+        return None
+    return max_versions(unique)
+
+
+def _best_effort_version(versions):
+    """Pick the highest declared version, or the last one if unparsable."""
+    try:
+        return max_versions(versions)
+    except ValueError:
+        return versions[-1]
+
+
+def merge_all_deps(declarations, intersect=False, best_effort=False):
+    """Merge the NPM dependencies of many sources at once.
+
+    All declarations are first grouped by dependency type and package, then
+    each group is resolved (see :func:`merge_deps`), so that all conflicts
+    are reported at once.
+
+    :param declarations: Iterable of ``(source, deps)`` tuples, where
+        ``deps`` is shaped like :attr:`pywebpack.bundle.WebpackBundle.dependencies`.
+    :param intersect: Intersect the version ranges instead of keeping the
+        highest version.
+    :param best_effort: Do not fail on conflicts, but keep the highest
+        declared version of the conflicting packages.
+    :return: Tuple ``(merged deps, list of DependencyConflict)``.
+    :raise: raises the MergeConflictError exception, with all the conflicts,
+        when deps cannot be merged and ``best_effort`` is not set. Different
+        versions of a package which are not all semantic versions (or ranges,
+        with ``intersect``), e.g. ``latest``, are a conflict.
+    """
+    dep_types = ["dependencies", "devDependencies", "peerDependencies"]
+    groups = {}
+    for source, deps in declarations:
+        for dep_type in dep_types:
+            for pkg, version in deps.get(dep_type, {}).items():
+                groups.setdefault((dep_type, pkg), []).append((source, version))
+
+    merged = {dep_type: {} for dep_type in dep_types}
+    conflicts = []
+    for (dep_type, pkg), declared in groups.items():
+        versions = [v for _source, v in declared]
+        try:
+            version = _resolve_versions(versions, intersect=intersect)
+        except ValueError:
+            # Not a version or range (e.g. ``latest`` or ``github:user/repo``).
+            version = None
+        if version is None:
+            conflicts.append(DependencyConflict(dep_type, pkg, declared))
+            version = _best_effort_version(versions)
+        merged[dep_type][pkg] = version
+
+    if conflicts and not best_effort:
+        raise MergeConflictError(
+            "; ".join(str(c) for c in conflicts), conflicts=conflicts
+        )
+    return merged, conflicts
+
+
+def compute_overrides(deps, policy=None, reference=False):
+    """Compute version pins for the packages of merged dependencies.
+
+    The result can be used as the ``overrides`` (npm) or ``resolutions``
+    (yarn) section of a ``package.json``, so that each package is installed
+    in a single version, including where it is a transitive dependency.
+    Peer dependencies are not pinned.
+
+    :param deps: Merged dependencies (e.g. a ``package.json``).
+    :param policy: Which packages to pin: ``None`` for all of them, an
+        iterable of package names, or a callable receiving the package name
+        and version and returning ``True`` if the package should be pinned.
+    :param reference: Pin the packages with a ``$name`` reference to the
+        direct dependency, as npm requires for ``overrides`` (it fails with
+        ``EOVERRIDE`` otherwise). Packages declared with different versions
+        in ``dependencies`` and ``devDependencies`` are then not pinned, as
+        no override can match both.
+    :return: dict of package name to version.
+    """
+    if policy is None:
+        allowed = lambda pkg, version: True  # noqa: E731
+    elif callable(policy):
+        allowed = policy
+    else:
+        names = set(policy)
+        allowed = lambda pkg, version: pkg in names  # noqa: E731
+
+    # Runtime dependencies take precedence over development ones.
+    dev = deps.get("devDependencies", {})
+    versions = dict(dev)
+    versions.update(deps.get("dependencies", {}))
+    overrides = {}
+    for pkg, version in sorted(versions.items()):
+        if not allowed(pkg, version):
+            continue
+        if reference:
+            if dev.get(pkg, version) != version:
+                continue
+            version = "$" + pkg
+        overrides[pkg] = version
+    return overrides
+
+
 def entry_points(group):
     """Entry points.
 
@@ -163,3 +382,62 @@ def entry_points(group):
         eps = m.entry_points(group=group)
 
     return eps
+
+
+def _sys_path_fingerprint(paths=None):
+    """Fingerprint of the installed distributions on ``sys.path``.
+
+    Only the directories are listed, no metadata is read. Any installed,
+    removed or upgraded distribution changes the name or modification time of
+    its ``.dist-info``/``.egg-info`` folder, and thus the fingerprint.
+    """
+    fingerprint = []
+    for path in sys.path if paths is None else paths:
+        try:
+            with os.scandir(path or ".") as it:
+                dists = sorted(
+                    (e.name, e.stat().st_mtime_ns)
+                    for e in it
+                    if e.name.endswith((".dist-info", ".egg-info", ".egg-link"))
+                )
+        except OSError:
+            # Not a directory (e.g. a zip file) or it does not exist.
+            continue
+        fingerprint.append([path, dists])
+    return content_hash(fingerprint)
+
+
+def cached_entry_points(group, cache_dir):
+    """Entry points, cached on disk.
+
+    The cache is keyed by a fingerprint of the distributions installed on
+    ``sys.path``, so the (slow) metadata scan is only redone when something
+    was installed or removed.
+
+    :param group: Entry point group name.
+    :param cache_dir: Directory where the cache file is stored.
+    :return: List of :class:`importlib.metadata.EntryPoint`.
+    """
+    cache_path = os.path.join(cache_dir, "entry_points.json")
+    fingerprint = _sys_path_fingerprint()
+
+    cache = {}
+    try:
+        with open(cache_path) as fp:
+            cache = json.load(fp)
+    except (OSError, ValueError):
+        pass
+    if cache.get("fingerprint") != fingerprint:
+        cache = {"fingerprint": fingerprint, "groups": {}}
+
+    groups = cache["groups"]
+    if group not in groups:
+        groups[group] = sorted([ep.name, ep.value] for ep in entry_points(group=group))
+        # Write atomically, in case of concurrent worker boots.
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "w") as fp:
+            json.dump(cache, fp)
+        os.replace(tmp_path, cache_path)
+
+    return [m.EntryPoint(name, value, group) for name, value in groups[group]]
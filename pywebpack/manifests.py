@@ -4,9 +4,20 @@
 
 """Webpack manifests API."""
 
+import gc
 import json
+import mmap
+import os
+import re
+import select
+import struct
 import sys
+import threading
+import time
+from itertools import chain
 from os.path import splitext
+from types import MappingProxyType
+from urllib.parse import urlsplit
 
 _string_types = (str,) if sys.version_info[0] == 3 else (basestring,)
 
@@ -34,21 +45,280 @@ class UnsupportedExtensionError(ManifestError):
     """Manifest contains a file with an extension that is not supported."""
 
 
+class ManifestConflictError(ManifestError):
+    """Several manifests contain an entry with the same name."""
+
+
+class ManifestTimeoutError(ManifestError, TimeoutError):
+    """Manifest was not completely built before the timeout."""
+
+
+#
+# Decoders
+#
+# Optional decoders, imported on first use as they are slow to import.
+orjson = None
+msgspec = None
+_decoders_imported = False
+_msgspec_decoders = {}
+
+
+def _import_decoders():
+    """Import the optional decoders, if installed."""
+    global orjson, msgspec, _decoders_imported
+    if _decoders_imported:
+        return
+    try:
+        import orjson
+    except ImportError:  # pragma: no cover
+        pass
+    try:
+        import msgspec
+    except ImportError:  # pragma: no cover
+        pass
+    _decoders_imported = True
+
+
+def _msgspec_type(schema):
+    """Build a msgspec type only decoding the keys of a schema."""
+    from typing import Any, Dict, Union
+
+    if schema is None:
+        return Any
+    if "*" in schema:
+        return Dict[str, _msgspec_type(schema["*"])]
+    return msgspec.defstruct(
+        "Schema",
+        [
+            (key, Union[_msgspec_type(sub), msgspec.UnsetType], msgspec.UNSET)
+            for key, sub in schema.items()
+        ],
+    )
+
+
+def decode_json(raw, schema=None):
+    """Decode JSON with the fastest available backend.
+
+    With a ``schema``, and if `msgspec` is installed, only the keys in the
+    schema are decoded; the other values are skipped without being
+    materialized. Otherwise the whole document is decoded, using `orjson` if
+    installed, or the standard library.
+
+    :param raw: JSON document as bytes.
+    :param schema: Keys to decode, as a nested dict. A ``None`` value keeps
+        the whole value, and a ``*`` key applies to all keys of an object.
+    """
+    _import_decoders()
+    if schema is not None and msgspec is not None:
+        key = id(schema)
+        if key not in _msgspec_decoders:
+            decoder = msgspec.json.Decoder(_msgspec_type(schema))
+            # Keep a reference to the schema so that its id is not reused.
+            _msgspec_decoders[key] = (schema, decoder)
+        try:
+            return msgspec.to_builtins(_msgspec_decoders[key][1].decode(raw))
+        except msgspec.DecodeError:
+            # Not shaped like the schema, decode it all.
+            pass
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class _RawObject(dict):
+    """Top-level JSON object whose values are decoded when accessed."""
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, msgspec.Raw):
+            value = msgspec.json.decode(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def values(self):
+        return (self[key] for key in self)
+
+    def items(self):
+        return ((key, self[key]) for key in self)
+
+
+def _decode_top_level(raw):
+    """Decode the keys of a JSON object, but not its values yet.
+
+    Used to sniff the type of a manifest cheaply. Returns ``None`` if
+    `msgspec` is not installed, or if the document is not an object.
+    """
+    _import_decoders()
+    if msgspec is None:
+        return None
+    from typing import Dict
+
+    try:
+        return _RawObject(msgspec.json.decode(raw, type=Dict[str, msgspec.Raw]))
+    except msgspec.DecodeError:
+        return None
+
+
 #
 # Manifest
 #
+def render_entries(entries, inline=None):
+    """Render several entries into a single HTML fragment.
+
+    Paths shared by several entries (e.g. a vendor or runtime chunk) are only
+    rendered once, at their first occurrence. Stylesheets are rendered before
+    the other files, which otherwise keep their order, followed by the legacy
+    scripts, and the preload links of imported chunks come last.
+
+    :param inline: :class:`InlinePolicy` deciding which files are inlined.
+    """
+    entries = list(entries)
+    seen = set()
+    css, others = [], []
+    for entry in entries:
+        for path in entry:
+            if path in seen:
+                continue
+            seen.add(path)
+            html = entry.render_path(path, inline)
+            (css if path.lower().endswith(".css") else others).append(html)
+    for entry in entries:
+        for path in entry.legacy:
+            if path in seen:
+                continue
+            seen.add(path)
+            others.append(entry.render_legacy(path))
+    for entry in entries:
+        for path in entry.imports:
+            if path in seen:
+                continue
+            seen.add(path)
+            others.append(entry.render_import(path))
+    return "".join(css + others)
+
+
+#: Preload destination (``as`` attribute) of the supported file extensions.
+PRELOAD_DESTINATIONS = {
+    ".js": "script",
+    ".mjs": "script",
+    ".css": "style",
+    ".woff2": "font",
+    ".woff": "font",
+    ".ttf": "font",
+    ".otf": "font",
+}
+
+#: MIME types of fonts, to let browsers skip unsupported formats.
+FONT_TYPES = {
+    ".woff2": "font/woff2",
+    ".woff": "font/woff",
+    ".ttf": "font/ttf",
+    ".otf": "font/otf",
+}
+
+
+def preload_hints(entries, modules=False, crossorigin=None):
+    """Compute the preload hints for the files of several entries.
+
+    The chunks imported by the entries are included after their files. Files
+    whose type cannot be preloaded are skipped, and files shared by several
+    entries are only included once.
+
+    :param entries: Manifest entries.
+    :param modules: Preload scripts as ES modules (``modulepreload``). The
+        scripts of module entries are always preloaded as modules.
+    :param crossorigin: Value of the ``crossorigin`` attribute of scripts and
+        stylesheets (e.g. ``anonymous``). Fonts are always preloaded in CORS
+        mode, as browsers require.
+    :return: List of ``(path, attributes)`` tuples, where attributes is a
+        list of ``(name, value)`` tuples.
+    """
+    hints, seen = [], set()
+    for entry in entries:
+        for path in chain(entry, entry.imports):
+            if path in seen:
+                continue
+            seen.add(path)
+            ext = splitext(path)[1].lower()
+            destination = PRELOAD_DESTINATIONS.get(ext)
+            if destination is None:
+                continue
+            if destination == "script" and (modules or entry.module):
+                attrs = [("rel", "modulepreload")]
+            else:
+                attrs = [("rel", "preload"), ("as", destination)]
+            if destination == "font":
+                attrs += [("type", FONT_TYPES[ext]), ("crossorigin", crossorigin or "")]
+            elif crossorigin:
+                attrs.append(("crossorigin", crossorigin))
+            hints.append((path, attrs))
+    return hints
+
+
+def render_preload_links(hints):
+    """Render preload hints as HTML ``<link>`` tags."""
+    out = []
+    for path, attrs in hints:
+        rendered = "".join(
+            f' {name}="{value}"' if value else f" {name}" for name, value in attrs
+        )
+        out.append(f'<link href="{path}"{rendered} />')
+    return "".join(out)
+
+
+def render_link_header(hints):
+    """Render preload hints as the value of an HTTP ``Link`` header.
+
+    The header can also be sent in a ``103 Early Hints`` response.
+    """
+    out = []
+    for path, attrs in hints:
+        params = []
+        for name, value in attrs:
+            if not value:
+                params.append(name)
+            elif "/" in value:
+                params.append(f'{name}="{value}"')
+            else:
+                params.append(f"{name}={value}")
+        out.append("; ".join([f"<{path}>"] + params))
+    return ", ".join(out)
+
+
+def _render_all(entries):
+    """Render the entries which can be rendered, by name."""
+    html = {}
+    for entry in entries:
+        try:
+            html[entry.name] = entry.render()
+        except UnsupportedExtensionError:
+            pass
+    return html
+
+
 class Manifest(object):
     """Assets manifest."""
 
+    __slots__ = ("_entries", "_html", "_rendered", "_hints")
+
     def __init__(self):
         """Initialize manifest."""
         self._entries = {}
+        self._html = None
+        self._rendered = {}
+        self._hints = {}
 
     def add(self, entry):
         """Add an entry to the manifest."""
         if entry.name in self._entries:
             raise KeyError("Entry {} already present".format(entry.name))
         self._entries[entry.name] = entry
+        self._html = None
+        self._rendered = {}
+        self._hints = {}
 
     def __getitem__(self, key):
         """Get a manifest entry."""
@@ -65,30 +335,216 @@ class Manifest(object):
         """Iterate over entries in the manifest."""
         return iter(self._entries.values())
 
+    def render_entries(self, names, inline=None):
+        """Render several entries into a single HTML fragment.
+
+        The result is memoized per tuple of entry names (unless files are
+        inlined), see :func:`render_entries`.
+
+        :param names: Names of the entries, in load order.
+        :param inline: :class:`InlinePolicy` deciding which files are inlined.
+        """
+        if inline is not None:
+            return render_entries((self[n] for n in names), inline)
+        names = tuple(names)
+        html = self._rendered.get(names)
+        if html is None:
+            html = self._rendered[names] = render_entries(self[n] for n in names)
+        return html
+
+    def _preload(self, render, names, modules, crossorigin):
+        """Render the preload hints of entries, memoized per entry set."""
+        key = (render, tuple(names), modules, crossorigin)
+        result = self._hints.get(key)
+        if result is None:
+            hints = preload_hints(
+                (self[n] for n in key[1]), modules=modules, crossorigin=crossorigin
+            )
+            result = self._hints[key] = render(hints)
+        return result
+
+    def preload_links(self, names, modules=False, crossorigin=None):
+        """Render ``<link rel="preload">`` tags for the files of entries.
+
+        See :func:`preload_hints` for the parameters.
+        """
+        return self._preload(render_preload_links, names, modules, crossorigin)
+
+    def link_header(self, names, modules=False, crossorigin=None):
+        """Get the ``Link`` header preloading the files of entries.
+
+        See :func:`preload_hints` for the parameters.
+        """
+        return self._preload(render_link_header, names, modules, crossorigin)
+
+    def to_html(self):
+        """Get the rendered HTML of all entries.
+
+        Entries which cannot be rendered (e.g. images or source maps listed by
+        webpack-manifest-plugin) are left out.
+
+        :return: A read-only mapping of entry name to rendered HTML.
+        """
+        if self._html is None:
+            self._html = MappingProxyType(_render_all(self))
+        return self._html
+
 
 class ManifestEntry(object):
-    """Represents a manifest entry."""
+    """Represents a manifest entry.
+
+    Entries of ES module builds (e.g. Vite) are rendered with module scripts,
+    and the chunks they import (transitively) with ``modulepreload`` links, so
+    that browsers fetch them in parallel rather than in a waterfall.
+
+    Entries with a legacy variant (see :func:`combine_variants`) render their
+    scripts as modules, followed by the legacy scripts with ``nomodule``, so
+    that each browser only loads one of them.
+    """
 
     templates = {
         ".js": '<script src="{}"></script>',
         ".css": '<link rel="stylesheet" href="{}" />',
     }
 
-    def __init__(self, name, paths):
-        """Initialize manifest entry."""
+    module_templates = {
+        ".js": '<script type="module" src="{}"></script>',
+    }
+
+    #: Templates of the inlined files (see :class:`InlinePolicy`).
+    inline_templates = {
+        ".js": "<script>{}</script>",
+        ".css": "<style>{}</style>",
+    }
+
+    module_inline_templates = {
+        ".js": '<script type="module">{}</script>',
+    }
+
+    #: Templates of the scripts of the legacy variant.
+    legacy_templates = {
+        ".js": '<script nomodule src="{}"></script>',
+    }
+
+    #: Templates of the imported chunks, for module and classic entries.
+    import_templates = {
+        True: '<link rel="modulepreload" href="{}" />',
+        False: '<link rel="preload" href="{}" as="script" />',
+    }
+
+    __slots__ = (
+        "name",
+        "_paths",
+        "_html",
+        "imports",
+        "module",
+        "metadata",
+        "legacy",
+        "attrs",
+    )
+
+    def __init__(
+        self,
+        name,
+        paths,
+        imports=None,
+        module=False,
+        metadata=None,
+        legacy=None,
+        attrs=None,
+    ):
+        """Initialize manifest entry.
+
+        :param imports: Paths of the chunks imported by the entry, including
+            the indirect imports.
+        :param module: The scripts of the entry are ES modules.
+        :param metadata: Dictionary of extra information on the entry (e.g.
+            the sizes of its files, see :func:`load_sizes`).
+        :param legacy: Paths of the scripts of the legacy variant of the
+            entry, for browsers without ES modules support.
+        :param attrs: Extra attributes of the script tags, e.g. ``["defer"]``
+            or ``["async"]``.
+        """
         self.name = name
-        self._paths = paths
+        self._paths = tuple(paths)
+        self._html = None
+        self.imports = tuple(imports or ())
+        self.module = module
+        self.metadata = metadata
+        self.legacy = tuple(legacy or ())
+        self.attrs = tuple(attrs or ())
 
-    def render(self):
-        """Render entry."""
-        out = []
-        for p in self._paths:
-            _dummy_name, ext = splitext(p)
-            tpl = self.templates.get(ext.lower())
-            if tpl is None:
-                raise UnsupportedExtensionError(p)
-            out.append(tpl.format(p))
-        return "".join(out)
+    @property
+    def options(self):
+        """Keyword arguments recreating the entry, besides name and paths."""
+        options = {}
+        if self.imports:
+            options["imports"] = list(self.imports)
+        if self.module:
+            options["module"] = True
+        if self.metadata:
+            options["metadata"] = self.metadata
+        if self.legacy:
+            options["legacy"] = list(self.legacy)
+        if self.attrs:
+            options["attrs"] = list(self.attrs)
+        return options
+
+    def render(self, inline=None):
+        """Render entry.
+
+        The HTML is rendered once and then reused, unless files are inlined.
+
+        :param inline: :class:`InlinePolicy` deciding which files are inlined.
+        """
+        if inline is not None:
+            return self._render(inline)
+        if self._html is None:
+            self._html = self._render()
+        return self._html
+
+    def render_path(self, path, inline=None):
+        """Render a single path of an entry.
+
+        :param inline: :class:`InlinePolicy` deciding if the file is inlined.
+        """
+        ext = splitext(path)[1].lower()
+        if inline is not None and ext in self.inline_templates:
+            content = inline.content(self, path)
+            if content is not None:
+                tpl = self.module and self.module_inline_templates.get(ext)
+                tpl = tpl or self.inline_templates[ext]
+                return tpl.format(_closing_tag_re.sub(r"<\\/\1", content))
+        tpl = self.module and self.module_templates.get(ext)
+        tpl = tpl or self.templates.get(ext)
+        if tpl is None:
+            raise UnsupportedExtensionError(path)
+        return self._script_attrs(tpl.format(path))
+
+    def render_legacy(self, path):
+        """Render a script of the legacy variant of the entry."""
+        tpl = self.legacy_templates.get(splitext(path)[1].lower())
+        if tpl is None:
+            raise UnsupportedExtensionError(path)
+        return self._script_attrs(tpl.format(path))
+
+    def _script_attrs(self, html):
+        """Add the extra attributes to a script tag."""
+        if self.attrs and html.startswith("<script"):
+            return "<script " + " ".join(self.attrs) + html[len("<script") :]
+        return html
+
+    def render_import(self, path):
+        """Render the preload link of an imported chunk."""
+        return self.import_templates[bool(self.module)].format(path)
+
+    def _render(self, inline=None):
+        """Render entry HTML."""
+        return "".join(
+            [self.render_path(p, inline) for p in self._paths]
+            + [self.render_legacy(p) for p in self.legacy]
+            + [self.render_import(p) for p in self.imports]
+        )
 
     def __iter__(self):
         """Iterate over files in the manifest entry."""
@@ -100,28 +556,226 @@ class ManifestEntry(object):
         return self.render()
 
 
+#
+# Assets
+#
+#: Suffix of the file recording the sizes of the files of a manifest, next to
+#: the manifest (see :func:`pywebpack.compression.precompress`).
+SIZES_SUFFIX = ".sizes.json"
+
+
+def asset_path(path, public_path=None):
+    """Get the path of a manifest file, relative to the output directory.
+
+    :param path: Path or URL of the file in the manifest.
+    :param public_path: Prefix of the paths in the manifest (webpack's
+        ``output.publicPath``). By default, the path of the URL is used.
+    """
+    if public_path and path.startswith(public_path):
+        path = path[len(public_path) :]
+    else:
+        path = urlsplit(path).path
+    return path.lstrip("/")
+
+
+# Closing tags ending an inlined script or stylesheet early.
+_closing_tag_re = re.compile(r"</(script|style)", re.IGNORECASE)
+
+
+class InlinePolicy(object):
+    """Policy deciding which files of entries are inlined in the HTML.
+
+    A script or stylesheet is inlined if its entry or path is listed in
+    ``include``, or if it is not larger than ``max_size`` bytes. Its content
+    is read from the output directory once, and read again only when its
+    modification time changed. The other files are rendered as external tags.
+    """
+
+    def __init__(self, output_dir, max_size=None, include=(), public_path=None):
+        """Initialize policy.
+
+        :param output_dir: Output directory of webpack.
+        :param max_size: Size (in bytes) up to which files are inlined.
+        :param include: Names of entries and paths of files to inline
+            regardless of their size.
+        :param public_path: Prefix of the paths in the manifest (see
+            :func:`asset_path`).
+        """
+        self.output_dir = output_dir
+        self.max_size = max_size
+        self.include = frozenset(include)
+        self.public_path = public_path
+        # path -> (mtime, content)
+        self._cache = {}
+
+    def content(self, entry, path):
+        """Get the content of a file to inline.
+
+        :return: The content, or ``None`` if the file is not inlined.
+        """
+        listed = entry.name in self.include or path in self.include
+        if not listed and self.max_size is None:
+            return None
+        filepath = os.path.join(self.output_dir, asset_path(path, self.public_path))
+        try:
+            st = os.stat(filepath)
+        except FileNotFoundError:
+            return None
+        if not listed and st.st_size > self.max_size:
+            return None
+        cached = self._cache.get(path)
+        if cached is not None and cached[0] == st.st_mtime_ns:
+            return cached[1]
+        with open(filepath, encoding="utf-8") as fp:
+            content = fp.read()
+        self._cache[path] = (st.st_mtime_ns, content)
+        return content
+
+
+def load_sizes(manifest, filepath):
+    """Set the file sizes recorded in a sizes file as entry metadata.
+
+    The metadata of each entry holds the total ``size`` of its files and
+    imports, the total size of each compressed format (e.g. ``gzip``), and
+    the sizes of each file under ``files``. Files not recorded are ignored.
+
+    :param manifest: :class:`Manifest` whose entries are updated.
+    :param filepath: Path of the sizes file.
+    """
+    with open(filepath, "rb") as fp:
+        files = decode_json(fp.read())["files"]
+    for entry in manifest:
+        recorded = {}
+        totals = {}
+        for path in chain(entry, entry.imports):
+            sizes = files.get(path)
+            if sizes is None or path in recorded:
+                continue
+            recorded[path] = {k: v for k, v in sizes.items() if k != "digest"}
+            for key, size in recorded[path].items():
+                totals[key] = totals.get(key, 0) + size
+        entry.metadata = dict(entry.metadata or {}, files=recorded, **totals)
+
+
+def combine_variants(modern, legacy, attrs=None, manifest_cls=None):
+    """Combine the manifests of a modern and a legacy build of the same entries.
+
+    The scripts of the legacy build become the legacy variant of the entry
+    with the same name in the modern build, whose own scripts are then
+    rendered as ES modules. Entries only present in one of the builds are kept
+    as they are.
+
+    :param modern: :class:`Manifest` of the modern build.
+    :param legacy: :class:`Manifest` of the legacy build.
+    :param attrs: Extra script attributes per entry name, e.g.
+        ``{"main.js": ["defer"]}``. The ``*`` key applies to the other entries.
+    :param manifest_cls: Class of the combined manifest (default:
+        :class:`Manifest`).
+    :return: A new manifest.
+    """
+    attrs = attrs or {}
+    combined = (manifest_cls or Manifest)()
+    names = set()
+    for entry in modern:
+        names.add(entry.name)
+        options = entry.options
+        try:
+            legacy_entry = legacy[entry.name]
+        except KeyError:
+            legacy_entry = None
+        if legacy_entry is not None:
+            scripts = [
+                p
+                for p in legacy_entry
+                if splitext(p)[1].lower() in entry.legacy_templates
+            ]
+            if scripts:
+                options.update(module=True, legacy=scripts)
+        entry_attrs = attrs.get(entry.name, attrs.get("*"))
+        if entry_attrs:
+            options["attrs"] = entry_attrs
+        combined.add(type(entry)(entry.name, entry, **options))
+    for entry in legacy:
+        if entry.name not in names:
+            entry_attrs = attrs.get(entry.name, attrs.get("*"))
+            if entry_attrs:
+                entry = type(entry)(
+                    entry.name, entry, **dict(entry.options, attrs=entry_attrs)
+                )
+            combined.add(entry)
+    return combined
+
+
 #
 # Factories
 #
 class ManifestFactory(object):
     """Manifest factory base class."""
 
-    def __init__(self, manifest_cls=Manifest, entry_cls=ManifestEntry):
-        """Initialize factory."""
+    #: Keys used by :meth:`create`, see :func:`decode_json`.
+    schema = None
+
+    def __init__(
+        self,
+        manifest_cls=Manifest,
+        entry_cls=ManifestEntry,
+        prerender=False,
+        decoder=None,
+    ):
+        """Initialize factory.
+
+        :param prerender: Render the entries when the manifest is created, so
+            that unsupported extensions are reported at load time.
+        :param decoder: Callable decoding the raw JSON, with the same
+            signature as :func:`decode_json` (default).
+        """
         self.manifest_cls = manifest_cls
         self.entry_cls = entry_cls
+        self.prerender = prerender
+        self.decoder = decoder or decode_json
+        self._strings = {}
+
+    @classmethod
+    def sniff(cls, data):
+        """Check if parsed data looks like a manifest of this type.
+
+        It is a cheap check on the top-level keys only. The manifest is fully
+        validated when it is created.
+        """
+        return isinstance(data, dict)
+
+    def load(self, filepath, decoder=None):
+        """Load a manifest file.
+
+        :param decoder: Overrides the decoder of the factory.
+        """
+        with open(filepath, "rb") as fp:
+            raw = fp.read()
+        return self.create((decoder or self.decoder)(raw, self.schema))
+
+    def create_entry(self, entry, paths, **options):
+        """Create a manifest entry instance.
 
-    def load(self, filepath):
-        """Load a manifest file."""
-        with open(filepath) as fp:
-            return self.create(json.load(fp))
+        Equal paths of different entries (e.g. a shared vendor chunk) are
+        deduplicated to a single string object.
 
-    def create_entry(self, entry, paths):
-        """Create a manifest entry instance."""
-        return self.entry_cls(entry, paths)
+        :param options: Extra arguments of the entry class (e.g. ``imports``).
+        """
+        strings = self._strings
+        # Only pass the options that are set, for custom entry classes.
+        options = {k: v for k, v in options.items() if v}
+        if "imports" in options:
+            options["imports"] = [strings.setdefault(p, p) for p in options["imports"]]
+        entry = self.entry_cls(
+            entry, [strings.setdefault(p, p) for p in paths], **options
+        )
+        if self.prerender:
+            entry.render()
+        return entry
 
     def create_manifest(self):
         """Create a manifest instance."""
+        self._strings = {}
         return self.manifest_cls()
 
 
@@ -141,6 +795,11 @@ class WebpackManifestFactory(ManifestFactory):
 class WebpackYamFactory(ManifestFactory):
     """Manifest factory for webpack-yam-plugin."""
 
+    @classmethod
+    def sniff(cls, data):
+        """Check if parsed data looks like a webpack-yam-plugin manifest."""
+        return isinstance(data, dict) and "status" in data and "files" in data
+
     def create(self, data):
         """Create manifest from parsed data."""
         # Is manifest of correct type?
@@ -163,6 +822,13 @@ class WebpackYamFactory(ManifestFactory):
 class WebpackBundleTrackerFactory(ManifestFactory):
     """Manifest factory for webpack-bundle-tracker."""
 
+    schema = {"status": None, "chunks": None, "assets": {"*": {"publicPath": None}}}
+
+    @classmethod
+    def sniff(cls, data):
+        """Check if parsed data looks like a webpack-bundle-tracker manifest."""
+        return isinstance(data, dict) and "status" in data and "chunks" in data
+
     def create(self, data):
         """Create manifest from parsed data."""
         # Is manifest of correct type?
@@ -201,31 +867,844 @@ class WebpackBundleTrackerFactory(ManifestFactory):
         return manifest
 
 
+def _asset_path(asset):
+    """Get the path of a webpack-assets-manifest asset.
+
+    Assets are objects with the ``integrity`` option, and strings otherwise.
+    """
+    return asset["src"] if isinstance(asset, dict) else asset
+
+
+class WebpackAssetsManifestFactory(ManifestFactory):
+    """Manifest factory for webpack-assets-manifest.
+
+    The ``entrypoints`` option of the plugin must be enabled. An entry point
+    ``main`` results in the entries ``main.js`` and ``main.css``, and the
+    scripts it preloads (``webpackPreload`` chunks) are its imports.
+    """
+
+    schema = {"entrypoints": None}
+
+    @classmethod
+    def sniff(cls, data):
+        """Check if parsed data looks like a webpack-assets-manifest manifest."""
+        return isinstance(data, dict) and isinstance(data.get("entrypoints"), dict)
+
+    def create(self, data):
+        """Create manifest from parsed data."""
+        try:
+            entrypoints = data["entrypoints"]
+            if not isinstance(entrypoints, dict):
+                raise TypeError(entrypoints)
+            manifest = self.create_manifest()
+            for entry_name, entrypoint in entrypoints.items():
+                assets = entrypoint["assets"]
+                js = [_asset_path(a) for a in assets.get("js", [])]
+                css = [_asset_path(a) for a in assets.get("css", [])]
+                preload = entrypoint.get("preload", {}).get("js", [])
+                if js:
+                    manifest.add(
+                        self.create_entry(
+                            entry_name + ".js",
+                            js,
+                            imports=[_asset_path(a) for a in preload],
+                        )
+                    )
+                if css:
+                    manifest.add(self.create_entry(entry_name + ".css", css))
+        except (AttributeError, KeyError, TypeError):
+            raise InvalidManifestError("webpack-assets-manifest")
+        return manifest
+
+
+class ViteManifestFactory(ManifestFactory):
+    """Manifest factory for Vite (``build.manifest`` option).
+
+    Entries are named after their source file (e.g. ``src/main.js``). Their
+    imports are the chunks they import statically, directly or not, and their
+    stylesheets include the ones of these chunks. The import graph is walked
+    once per chunk when the manifest is created.
+
+    Paths of the manifest are relative to the output directory, and are
+    prefixed with :attr:`base`.
+    """
+
+    #: Public path of the output directory (Vite's ``base`` option).
+    base = "/"
+
+    #: Also preload the dynamically imported chunks, and their imports.
+    preload_dynamic = False
+
+    @classmethod
+    def sniff(cls, data):
+        """Check if parsed data looks like a Vite manifest."""
+        if not isinstance(data, dict) or not data:
+            return False
+        chunk = next(iter(data.values()))
+        return isinstance(chunk, dict) and "file" in chunk
+
+    def _imports(self, chunks, key, memo):
+        """Get the keys of the chunks imported by a chunk, in load order."""
+        if key not in memo:
+            # Placeholder, in case of an import cycle.
+            memo[key] = ()
+            fields = ["imports"]
+            if self.preload_dynamic:
+                fields.append("dynamicImports")
+            imported = {}
+            for field in fields:
+                for dep in chunks[key].get(field, []):
+                    for k in self._imports(chunks, dep, memo) + (dep,):
+                        imported[k] = None
+            imported.pop(key, None)
+            memo[key] = tuple(imported)
+        return memo[key]
+
+    def create(self, data):
+        """Create manifest from parsed data."""
+        base = self.base
+        memo = {}
+        manifest = self.create_manifest()
+        try:
+            for key, chunk in data.items():
+                if not chunk.get("isEntry"):
+                    continue
+                imported = self._imports(data, key, memo)
+                paths = {}
+                for k in (key,) + imported:
+                    for css in data[k].get("css", []):
+                        paths[base + css] = None
+                paths[base + chunk["file"]] = None
+                manifest.add(
+                    self.create_entry(
+                        key,
+                        list(paths),
+                        imports=[base + data[k]["file"] for k in imported],
+                        module=True,
+                    )
+                )
+        except (AttributeError, KeyError, TypeError):
+            raise InvalidManifestError("vite")
+        return manifest
+
+
 class ManifestLoader(object):
     """Loads a Webpack manifest (multiple types supported)."""
 
     types = [
         WebpackBundleTrackerFactory,
         WebpackYamFactory,
+        WebpackAssetsManifestFactory,
+        ViteManifestFactory,
         WebpackManifestFactory,
     ]
 
-    def __init__(self, manifest_cls=Manifest, entry_cls=ManifestEntry):
-        """Initialize loader."""
+    def __init__(
+        self,
+        manifest_cls=Manifest,
+        entry_cls=ManifestEntry,
+        prerender=False,
+        decoder=None,
+        sizes=False,
+    ):
+        """Initialize loader.
+
+        :param prerender: Render the entries at load time (see
+            :class:`ManifestFactory`).
+        :param decoder: Callable decoding the raw JSON (see
+            :class:`ManifestFactory`).
+        :param sizes: Set the file sizes recorded next to the manifest (see
+            :func:`pywebpack.compression.precompress`) as entry metadata, if
+            they were recorded.
+        """
         self.manifest_cls = manifest_cls
         self.entry_cls = entry_cls
+        self.prerender = prerender
+        self.decoder = decoder or decode_json
+        self.sizes = sizes
+        self.types = list(self.types)
+        # (modern path, legacy path) -> (modern, legacy, attrs, combined)
+        self._variants = {}
+        self._sniffers = {}
+        self._factories = {}
+        # filepath -> factory class of the manifest
+        self._detected = {}
+
+    def register(self, factory_cls, sniff=None, first=True):
+        """Register a manifest factory.
 
-    def load(self, filepath):
-        """Load a manifest from a file."""
-        with open(filepath) as fp:
-            data = json.load(fp)
+        :param factory_cls: :class:`ManifestFactory` subclass.
+        :param sniff: Predicate receiving the parsed data and returning
+            ``True`` if it looks like a manifest of this type. Defaults to
+            the ``sniff`` method of the factory.
+        :param first: Try the factory before the already registered ones.
+        """
+        if sniff is not None:
+            self._sniffers[factory_cls] = sniff
+        if first:
+            self.types.insert(0, factory_cls)
+        else:
+            self.types.append(factory_cls)
 
-        for t in self.types:
+    def _factory(self, factory_cls):
+        """Get a factory instance."""
+        if factory_cls not in self._factories:
+            self._factories[factory_cls] = factory_cls(
+                manifest_cls=self.manifest_cls,
+                entry_cls=self.entry_cls,
+                prerender=self.prerender,
+                decoder=self.decoder,
+            )
+        return self._factories[factory_cls]
+
+    def detect(self, data):
+        """Get the factory classes whose sniffing predicate matches the data."""
+        return [t for t in self.types if self._sniffers.get(t, t.sniff)(data)]
+
+    def load(self, filepath, decoder=None):
+        """Load a manifest from a file.
+
+        The manifest type is sniffed from its top-level keys (without
+        decoding the values, if `msgspec` is installed), and only the keys
+        needed by the factory are decoded. The detected type is remembered per
+        file, so later loads of the same file go straight to the right
+        factory.
+
+        :param decoder: Overrides the decoder of the loader.
+        """
+        manifest = self._create(filepath, decoder or self.decoder)
+        if self.sizes and os.path.exists(filepath + SIZES_SUFFIX):
+            load_sizes(manifest, filepath + SIZES_SUFFIX)
+        return manifest
+
+    def _create(self, filepath, decoder):
+        """Create a manifest from a file, with the factory of its type."""
+        with open(filepath, "rb") as fp:
+            raw = fp.read()
+
+        detected = self._detected.get(filepath)
+        if detected is not None:
             try:
-                return t(
-                    manifest_cls=self.manifest_cls, entry_cls=self.entry_cls
-                ).create(data)
+                return self._factory(detected).create(decoder(raw, detected.schema))
             except InvalidManifestError:
-                pass
+                # The manifest type changed, detect it again.
+                self._detected.pop(filepath, None)
+
+        # Sniff the type from the top-level keys, then only decode what the
+        # candidate factories need.
+        top = _decode_top_level(raw)
+        if top is None:
+            top = decoder(raw)
+            decoded = {id(None): top}
+        else:
+            decoded = {}
+
+        for t in self.detect(top):
+            key = id(t.schema)
+            if key not in decoded:
+                decoded[key] = decoder(raw, t.schema)
+            try:
+                manifest = self._factory(t).create(decoded[key])
+            except InvalidManifestError:
+                continue
+            self._detected[filepath] = t
+            return manifest
 
         raise UnsupportedManifestError(filepath)
+
+    def load_variants(self, modern_path, legacy_path, attrs=None):
+        """Load the manifests of a modern and a legacy build together.
+
+        The combined manifest is reused as long as both manifests are (e.g.
+        with a :class:`CachedManifestLoader`). See :func:`combine_variants`.
+
+        :param modern_path: Path of the manifest of the modern build.
+        :param legacy_path: Path of the manifest of the legacy build.
+        :param attrs: Extra script attributes per entry name.
+        """
+        modern = self.load(modern_path)
+        legacy = self.load(legacy_path)
+        key = (modern_path, legacy_path)
+        cached = self._variants.get(key)
+        if (
+            cached is not None
+            and cached[0] is modern
+            and cached[1] is legacy
+            and cached[2] == attrs
+        ):
+            return cached[3]
+        combined = combine_variants(
+            modern, legacy, attrs=attrs, manifest_cls=self.manifest_cls
+        )
+        if self.prerender:
+            combined.to_html()
+        self._variants[key] = (modern, legacy, attrs, combined)
+        return combined
+
+    def load_html(self, filepath):
+        """Load a manifest as a read-only mapping of entry name to HTML.
+
+        This is the fastest way to look up the rendered HTML of entries.
+        """
+        return self.load(filepath).to_html()
+
+
+#
+# Readiness
+#
+# Errors raised while a manifest is missing, partially written or unfinished.
+_NOT_READY = (FileNotFoundError, UnfinishedManifestError, ValueError)
+
+# Initial and maximum delays between two checks of a manifest.
+_MIN_INTERVAL = 0.01
+_MAX_INTERVAL = 0.5
+
+
+class _Inotify(object):
+    """Minimal inotify binding, watching the files written in a directory."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+
+    def __init__(self, path):
+        """Watch a directory."""
+        # Only imported when waiting for a manifest.
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            errno = ctypes.get_errno()
+            self.close()
+            raise OSError(errno, "inotify_add_watch failed")
+
+    def fileno(self):
+        """File descriptor becoming readable when a file was written."""
+        return self.fd
+
+    def drain(self):
+        """Discard the pending events."""
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        """Stop watching."""
+        os.close(self.fd)
+
+
+def _watch(filepath):
+    """Watch the directory of a manifest, if inotify is available."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return _Inotify(os.path.dirname(os.path.abspath(filepath)))
+    except (AttributeError, OSError):
+        return None
+
+
+def _wait(load, filepath, timeout):
+    """Call ``load`` until the manifest is ready."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = _MIN_INTERVAL
+    # Watch before the first attempt, so that no write is missed.
+    watcher = _watch(filepath)
+    try:
+        while True:
+            try:
+                return load()
+            except _NOT_READY:
+                pass
+            wait = _MAX_INTERVAL if watcher else delay
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ManifestTimeoutError(filepath)
+                wait = min(wait, remaining)
+            if watcher:
+                # Wake up on writes, and periodically in case one is missed
+                # (e.g. the directory itself was replaced).
+                select.select([watcher], [], [], wait)
+                watcher.drain()
+            else:
+                time.sleep(wait)
+                delay = min(delay * 2, _MAX_INTERVAL)
+    finally:
+        if watcher:
+            watcher.close()
+
+
+def wait_for_manifest(filepath, timeout=None, loader=None):
+    """Wait for a manifest to be completely built, and load it.
+
+    The manifest is loaded again each time a file is written in its directory
+    (using inotify, where available), or periodically with an exponential
+    backoff otherwise, until it exists and its status is ``built``/``done``.
+
+    :param filepath: Path of the manifest.
+    :param timeout: Maximum number of seconds to wait, or ``None`` to wait
+        indefinitely.
+    :param loader: :class:`ManifestLoader` used to load the manifest.
+    :raises ManifestTimeoutError: If the manifest was not ready in time.
+    """
+    loader = loader or ManifestLoader()
+    return _wait(lambda: loader.load(filepath), filepath, timeout)
+
+
+async def wait_for_manifest_async(filepath, timeout=None, loader=None):
+    """Wait for a manifest to be completely built, and load it (asyncio).
+
+    Same as :func:`wait_for_manifest`, without blocking the event loop while
+    waiting.
+    """
+    # Only imported when waiting for a manifest.
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    loader = loader or ManifestLoader()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    delay = _MIN_INTERVAL
+    watcher = _watch(filepath)
+    try:
+        while True:
+            try:
+                return loader.load(filepath)
+            except _NOT_READY:
+                pass
+            wait = _MAX_INTERVAL if watcher else delay
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ManifestTimeoutError(filepath)
+                wait = min(wait, remaining)
+            if watcher:
+                written = asyncio.Event()
+                loop.add_reader(watcher.fileno(), written.set)
+                try:
+                    await asyncio.wait_for(written.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                finally:
+                    loop.remove_reader(watcher.fileno())
+                watcher.drain()
+            else:
+                await asyncio.sleep(wait)
+                delay = min(delay * 2, _MAX_INTERVAL)
+    finally:
+        if watcher:
+            watcher.close()
+
+
+class CachedManifestLoader(ManifestLoader):
+    """Loads a Webpack manifest and keeps it in memory.
+
+    The manifest file is revalidated with a cheap ``os.stat`` at most every
+    ``check_interval`` seconds, and only reparsed if it was replaced (i.e. its
+    modification time, size or inode changed). While a thread reparses a
+    manifest, the other threads keep being served the previous one, which is
+    also served while the new manifest is unfinished or cannot be decoded.
+    """
+
+    def __init__(self, *args, check_interval=1.0, wait_timeout=None, **kwargs):
+        """Initialize loader.
+
+        Accepts the same arguments as :class:`ManifestLoader`, and:
+
+        :param check_interval: Minimum number of seconds between two checks
+            of the manifest file. Use ``0`` to check on each load.
+        :param wait_timeout: Maximum number of seconds to wait for a manifest
+            which does not exist yet or is still being built, when it is
+            first loaded. By default, the loading fails right away.
+        """
+        super(CachedManifestLoader, self).__init__(*args, **kwargs)
+        self.check_interval = check_interval
+        self.wait_timeout = wait_timeout
+        # filepath -> (stat key, manifest, time of last check)
+        self._cache = {}
+        self._locks = {}
+
+    @staticmethod
+    def _stat_key(filepath):
+        """Identify the current version of a file."""
+        st = os.stat(filepath)
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def load(self, filepath, decoder=None):
+        """Load a manifest from a file, or from the cache if unchanged.
+
+        With a ``wait_timeout``, the first load of a manifest waits for it to
+        be completely built (see :func:`wait_for_manifest`).
+        """
+        if self.wait_timeout is not None and filepath not in self._cache:
+            return _wait(
+                lambda: self._load(filepath, decoder), filepath, self.wait_timeout
+            )
+        return self._load(filepath, decoder)
+
+    def _load(self, filepath, decoder):
+        """Load a manifest from a file, or from the cache if unchanged."""
+        now = time.monotonic()
+        cached = self._cache.get(filepath)
+        if cached is not None and now - cached[2] < self.check_interval:
+            return cached[1]
+
+        key = self._stat_key(filepath)
+        if cached is not None and cached[0] == key:
+            self._cache[filepath] = (key, cached[1], now)
+            return cached[1]
+
+        lock = self._locks.setdefault(filepath, threading.Lock())
+        # Serve the previous manifest while another thread is reparsing it.
+        if not lock.acquire(blocking=cached is None):
+            return cached[1]
+        try:
+            # The manifest may have been reloaded while waiting for the lock.
+            current = self._cache.get(filepath)
+            if current is not None and current is not cached and current[0] == key:
+                return current[1]
+            try:
+                manifest = super(CachedManifestLoader, self).load(filepath, decoder)
+            except (UnfinishedManifestError, ValueError):
+                if cached is None:
+                    raise
+                # Being rebuilt (or partially written): keep serving the
+                # previous manifest, and retry after the check interval.
+                self._cache[filepath] = (cached[0], cached[1], now)
+                return cached[1]
+            self._cache[filepath] = (key, manifest, now)
+            return manifest
+        finally:
+            lock.release()
+
+    def preload(self, *filepaths, freeze=True):
+        """Load manifests before forking worker processes.
+
+        The manifests are loaded and rendered (except the entries which cannot
+        be rendered, see :meth:`Manifest.to_html`), so that workers do not
+        have to allocate anything to serve them. With ``freeze``, all objects
+        are then moved to the permanent generation of the garbage collector
+        (see :func:`gc.freeze`), so that collections in the workers do not
+        touch (and thus copy) the memory pages shared with the parent process.
+        """
+        for filepath in filepaths:
+            self.load(filepath).to_html()
+        if freeze and hasattr(gc, "freeze"):
+            gc.collect()
+            gc.freeze()
+
+    def clear(self):
+        """Clear the cached manifests."""
+        self._cache.clear()
+
+
+class ManifestSet(object):
+    """Several manifests looked up through a single index.
+
+    Entries of namespaced manifests are looked up as ``namespace:name``.
+    Lookups are a single dict access, whatever the number of manifests. The
+    manifests are revalidated (and reloaded, independently, when their file
+    changed) at most every ``check_interval`` seconds.
+    """
+
+    def __init__(self, manifests, loader=None, check_interval=1.0, separator=":"):
+        """Initialize manifest set.
+
+        :param manifests: Iterable of manifest paths, or of
+            ``(namespace, path)`` tuples (``None`` for no namespace).
+        :param loader: Loader of the manifests (default:
+            :class:`CachedManifestLoader`).
+        :param check_interval: Minimum number of seconds between two checks
+            of the manifest files.
+        :param separator: Separator between namespace and entry name.
+        """
+        self.loader = loader or CachedManifestLoader(check_interval=0)
+        self.check_interval = check_interval
+        self.separator = separator
+        self._sources = [
+            (None, m) if isinstance(m, _string_types) else tuple(m) for m in manifests
+        ]
+        self._manifests = []
+        # (index, rendered fragments), swapped together on refresh so that a
+        # concurrent lookup never mixes an index with stale fragments.
+        self._state = ({}, {})
+        self._checked = None
+
+    def _build_index(self, manifests):
+        """Index the entries of all manifests, detecting conflicts."""
+        index, origins = {}, {}
+        for (namespace, path), manifest in zip(self._sources, manifests):
+            for entry in manifest:
+                key = entry.name
+                if namespace:
+                    key = namespace + self.separator + key
+                if key in index:
+                    raise ManifestConflictError(
+                        f"Entry {key} is present in both {origins[key]} and {path}."
+                    )
+                index[key] = entry
+                origins[key] = path
+        return index
+
+    def refresh(self):
+        """Reload the manifests that changed and rebuild the index."""
+        manifests = [self.loader.load(path) for _namespace, path in self._sources]
+        if len(manifests) != len(self._manifests) or any(
+            m is not prev for m, prev in zip(manifests, self._manifests)
+        ):
+            self._state = (self._build_index(manifests), {})
+            self._manifests = manifests
+        self._checked = time.monotonic()
+
+    def _check(self):
+        """Refresh the index if the check interval elapsed.
+
+        :return: The ``(index, rendered)`` state to use for a lookup.
+        """
+        if (
+            self._checked is None
+            or time.monotonic() - self._checked >= self.check_interval
+        ):
+            self.refresh()
+        return self._state
+
+    def __getitem__(self, key):
+        """Get a manifest entry."""
+        index, _rendered = self._check()
+        return index[key]
+
+    def __getattr__(self, name):
+        """Get a manifest entry."""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError("Attribute {} does not exists.".format(name))
+
+    def render_entries(self, names, inline=None):
+        """Render several entries into a single HTML fragment.
+
+        See :meth:`Manifest.render_entries`.
+        """
+        index, rendered = self._check()
+        if inline is not None:
+            return render_entries((index[n] for n in names), inline)
+        names = tuple(names)
+        html = rendered.get(names)
+        if html is None:
+            html = rendered[names] = render_entries(index[n] for n in names)
+        return html
+
+    def __contains__(self, key):
+        """Check if an entry is in one of the manifests."""
+        index, _rendered = self._check()
+        return key in index
+
+    def __iter__(self):
+        """Iterate over the entries of all manifests."""
+        index, _rendered = self._check()
+        return iter(index.values())
+
+
+#
+# Compiled manifests
+#
+# Layout of a compiled manifest (little-endian):
+#
+# - header: magic, source mtime (ns), source size, number of entries;
+# - index: one record per entry, sorted by name, with the offsets and lengths
+#   of its name, paths and options (JSON-encoded) and pre-rendered HTML;
+# - data: UTF-8 encoded strings referenced by the index.
+_COMPILED_MAGIC = b"PYWPMAN2"
+_compiled_header = struct.Struct("<8sqQI")
+_compiled_record = struct.Struct("<IIIIII")
+_NO_HTML = 0xFFFFFFFF
+
+
+def _source_key(filepath):
+    """Identify the version of a manifest a compiled manifest was built from."""
+    st = os.stat(filepath)
+    return st.st_mtime_ns, st.st_size
+
+
+def compile_manifest(filepath, output_path=None, loader=None):
+    """Compile a manifest into a compact binary file.
+
+    The compiled file is meant to be generated at build time, next to the
+    manifest, and loaded by :class:`CompiledManifestLoader`.
+
+    :param filepath: Path to a manifest supported by ``loader``.
+    :param output_path: Path of the compiled manifest (default: the manifest
+        path with a ``.bin`` suffix).
+    :param loader: :class:`ManifestLoader` used to load the manifest.
+    :return: Path of the compiled manifest.
+    """
+    output_path = output_path or filepath + ".bin"
+    mtime_ns, size = _source_key(filepath)
+    manifest = (loader or ManifestLoader()).load(filepath)
+
+    records = []
+    for entry in manifest:
+        try:
+            html = entry.render().encode("utf-8")
+        except UnsupportedExtensionError:
+            html = None
+        spec = json.dumps([list(entry), getattr(entry, "options", {})])
+        records.append((entry.name.encode("utf-8"), spec.encode("utf-8"), html))
+    records.sort(key=lambda r: r[0])
+
+    index, data = [], bytearray()
+    for name, paths, html in records:
+        record = [len(data), len(name)]
+        data += name
+        record += [len(data), len(paths)]
+        data += paths
+        if html is None:
+            record += [0, _NO_HTML]
+        else:
+            record += [len(data), len(html)]
+            data += html
+        index.append(_compiled_record.pack(*record))
+
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as fp:
+        fp.write(_compiled_header.pack(_COMPILED_MAGIC, mtime_ns, size, len(records)))
+        fp.write(b"".join(index))
+        fp.write(data)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+class CompiledManifest(Manifest):
+    """Manifest backed by a memory-mapped compiled manifest.
+
+    Entries are looked up with a binary search on the mapped file, and only
+    the looked up entries are materialized.
+    """
+
+    __slots__ = ("source_key", "_mmap", "_count", "_data_offset", "_entry_cls")
+
+    def __init__(self, filepath, entry_cls=ManifestEntry):
+        """Open a compiled manifest."""
+        super(CompiledManifest, self).__init__()
+        self._entry_cls = entry_cls
+        with open(filepath, "rb") as fp:
+            self._mmap = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, mtime_ns, size, self._count = _compiled_header.unpack_from(self._mmap)
+        if magic != _COMPILED_MAGIC:
+            self.close()
+            raise InvalidManifestError(filepath)
+        self.source_key = (mtime_ns, size)
+        self._data_offset = _compiled_header.size + self._count * _compiled_record.size
+
+    def close(self):
+        """Unmap the compiled manifest."""
+        self._mmap.close()
+
+    def _record(self, i):
+        """Get the i-th index record."""
+        return _compiled_record.unpack_from(
+            self._mmap, _compiled_header.size + i * _compiled_record.size
+        )
+
+    def _string(self, offset, length):
+        """Read a string from the data section."""
+        start = self._data_offset + offset
+        return self._mmap[start : start + length].decode("utf-8")
+
+    def _find(self, name):
+        """Binary search the index record of an entry."""
+        key = name.encode("utf-8")
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            record = self._record(mid)
+            start = self._data_offset + record[0]
+            current = self._mmap[start : start + record[1]]
+            if current == key:
+                return record
+            if current < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def _entry(self, record):
+        """Materialize an entry from its index record."""
+        name_off, name_len, paths_off, paths_len, html_off, html_len = record
+        name = self._string(name_off, name_len)
+        paths, options = json.loads(self._string(paths_off, paths_len))
+        entry = self._entry_cls(name, paths, **options)
+        if html_len != _NO_HTML:
+            entry._html = self._string(html_off, html_len)
+        self._entries[name] = entry
+        return entry
+
+    def __getitem__(self, key):
+        """Get a manifest entry."""
+        entry = self._entries.get(key)
+        if entry is None:
+            record = self._find(key)
+            if record is None:
+                raise KeyError(key)
+            entry = self._entry(record)
+        return entry
+
+    def __getattr__(self, name):
+        """Get a manifest entry."""
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError("Attribute {} does not exists.".format(name))
+
+    def __iter__(self):
+        """Iterate over entries in the manifest."""
+        for i in range(self._count):
+            record = self._record(i)
+            name = self._string(record[0], record[1])
+            yield self._entries.get(name) or self._entry(record)
+
+    def to_html(self):
+        """Get the rendered HTML of all entries, see :meth:`Manifest.to_html`."""
+        if self._html is None:
+            self._html = MappingProxyType(_render_all(self))
+        return self._html
+
+
+class CompiledManifestLoader(ManifestLoader):
+    """Loads compiled manifests, falling back to the JSON manifests.
+
+    The compiled manifest (see :func:`compile_manifest`) is used if it exists
+    and was compiled from the current version of the manifest file.
+    Otherwise, the manifest file itself is loaded.
+    """
+
+    def __init__(self, *args, compiled_suffix=".bin", **kwargs):
+        """Initialize loader.
+
+        Accepts the same arguments as :class:`ManifestLoader`, and:
+
+        :param compiled_suffix: Suffix of the compiled manifest path.
+        """
+        super(CompiledManifestLoader, self).__init__(*args, **kwargs)
+        self.compiled_suffix = compiled_suffix
+
+    def load(self, filepath, decoder=None):
+        """Load a manifest from its compiled or JSON file."""
+        compiled_path = filepath + self.compiled_suffix
+        if os.path.exists(compiled_path):
+            manifest = CompiledManifest(compiled_path, entry_cls=self.entry_cls)
+            try:
+                source_key = _source_key(filepath)
+            except FileNotFoundError:
+                # Only the compiled manifest was deployed.
+                return manifest
+            if manifest.source_key == source_key:
+                return manifest
+            manifest.close()
+        return super(CompiledManifestLoader, self).load(filepath, decoder)
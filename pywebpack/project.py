@@ -5,17 +5,33 @@
 """API for creating and building Webpack projects."""
 
 import json
+import os
 import pathlib
+import re
 import shutil
+import warnings
+from copy import deepcopy
+from itertools import chain
 from os import makedirs
-from os.path import dirname, exists, join
+from os.path import basename, dirname, exists, isdir, join, normpath, splitext
 
 from pynpm import NPMPackage, YarnPackage
 
-from pywebpack.errors import MergeConflictError
+from .budgets import check_budgets
+from .errors import BudgetExceededError
+from .helpers import (
+    cached,
+    check_exit,
+    compute_overrides,
+    content_hash,
+    merge_all_deps,
+)
+from .manifests import ManifestLoader, asset_path
+from .storage import FileStorage, ParallelFileStorage, iter_files, tree_digest
 
-from .helpers import cached, check_exit, merge_deps
-from .storage import FileStorage
+# Patterns of copy-webpack-plugin which cannot be executed by pywebpack.
+_GLOB_CHARS = re.compile(r"[*?[\]{}]")
+_TEMPLATE = re.compile(r"\[\\*([\w:]+)\\*\]")
 
 
 class WebpackProject(object):
@@ -64,6 +80,105 @@ class WebpackProject(object):
         self.install()
         self.build()
 
+    def _missing_files(self, output_dir, manifest, public_path=None, loader=None):
+        """Get the paths of a manifest which are missing in a directory."""
+        manifest = (loader or ManifestLoader()).load(join(output_dir, manifest))
+        missing = []
+        for entry in manifest:
+            for path in chain(entry, getattr(entry, "imports", ())):
+                if not exists(join(output_dir, asset_path(path, public_path))):
+                    missing.append(path)
+        return missing
+
+    def publish(
+        self,
+        output_dir,
+        publish_dir,
+        manifest="manifest.json",
+        version=None,
+        keep=3,
+        public_path=None,
+        loader=None,
+        build=True,
+    ):
+        """Publish the build output atomically.
+
+        The output directory of webpack is copied into a new version directory
+        of ``publish_dir``, and once every path referenced by the manifest is
+        verified to exist in it, the ``current`` symlink of ``publish_dir`` is
+        switched to it with an atomic rename. Serving files and loading the
+        manifest from ``publish_dir/current`` thus never exposes a partial
+        build (e.g. during a rolling deploy), and a
+        :class:`~pywebpack.manifests.CachedManifestLoader` picks up the new
+        manifest as soon as the symlink is switched.
+
+        :param output_dir: Output directory of webpack.
+        :param publish_dir: Directory holding the published versions.
+        :param manifest: Path of the manifest, relative to ``output_dir``.
+        :param version: Name of the version directory. Defaults to a hash of
+            the paths and contents of all the files of ``output_dir``, so
+            that publishing the same build twice reuses it. An existing
+            version directory is reused as is.
+        :param keep: Number of versions to retain (including the published
+            one), or ``None`` to retain them all.
+        :param public_path: Prefix of the paths in the manifest (webpack's
+            ``output.publicPath``), stripped to locate the files. By default,
+            the path of the URLs is used, so it is required as soon as the
+            output directory is served under a prefix (e.g. ``/static/dist/``),
+            otherwise every file is reported missing.
+        :param loader: :class:`~pywebpack.manifests.ManifestLoader` used to
+            load the manifest.
+        :param build: Run the build script first.
+        :return: Path of the published version directory.
+        """
+        if build:
+            self.build()
+        version = version or tree_digest(output_dir)[:12]
+        version_dir = join(publish_dir, version)
+
+        if not exists(version_dir):
+            tmp_dir = join(publish_dir, "." + version + ".tmp")
+            if exists(tmp_dir):
+                shutil.rmtree(tmp_dir)
+            ParallelFileStorage(output_dir, tmp_dir).run()
+            missing = self._missing_files(tmp_dir, manifest, public_path, loader)
+            if missing:
+                shutil.rmtree(tmp_dir)
+                raise RuntimeError(
+                    "Manifest references files missing from the build output: "
+                    + ", ".join(missing)
+                )
+            os.rename(tmp_dir, version_dir)
+        else:
+            # Published again, it is now the most recent version.
+            os.utime(version_dir)
+
+        # Atomically switch the symlink to the new version.
+        current = join(publish_dir, "current")
+        tmp_link = join(publish_dir, ".current.tmp")
+        if os.path.lexists(tmp_link):
+            os.remove(tmp_link)
+        os.symlink(version, tmp_link)
+        os.replace(tmp_link, current)
+
+        if keep is not None:
+            self._collect_versions(publish_dir, version, keep)
+        return version_dir
+
+    @staticmethod
+    def _collect_versions(publish_dir, current, keep):
+        """Remove the oldest versions, keeping ``keep`` of them."""
+        versions = [
+            e
+            for e in os.scandir(publish_dir)
+            if not e.name.startswith(".")
+            and e.name not in ("current", current)
+            and e.is_dir(follow_symlinks=False)
+        ]
+        versions.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        for entry in versions[max(keep - 1, 0) :]:
+            shutil.rmtree(entry.path)
+
 
 class WebpackTemplateProject(WebpackProject):
     """API for creating and building a webpack project based on a template.
@@ -156,6 +271,13 @@ class WebpackBundleProject(WebpackTemplateProject):
         storage_cls=None,
         package_json_source_path="package.json",
         allowed_copy_paths=None,
+        execute_copy=False,
+        copy_link=False,
+        intersect_dependencies=False,
+        allow_dependency_conflicts=False,
+        overrides_field=None,
+        overrides_policy=None,
+        budgets=None,
     ):
         """Initialize templated folder.
 
@@ -177,10 +299,44 @@ class WebpackBundleProject(WebpackTemplateProject):
             `project_template_dir` to the project's package.json.
         :param allowed_copy_paths: List of paths (absolute, or relative to
             the `config_path`) that are allowed for bundle copy instructions.
+        :param execute_copy: If ``True``, the copy instructions are executed
+            by pywebpack on :meth:`build` (after the npm dependencies are
+            installed) instead of being passed to webpack. See
+            :meth:`copy_assets` for the supported instructions.
+        :param copy_link: If ``True``, files copied by pywebpack are
+            hardlinked where possible.
+        :param intersect_dependencies: If ``True``, the npm version ranges
+            of the dependencies are intersected across bundles, instead of
+            keeping the highest version (see
+            :func:`pywebpack.helpers.merge_deps`).
+        :param allow_dependency_conflicts: If ``True``, conflicting
+            dependencies (of the bundles and of the source package.json) do
+            not fail, the highest declared version is used instead. The
+            conflicts are available in :attr:`dependency_conflicts`.
+        :param overrides_field: If set to ``overrides`` (npm) or
+            ``resolutions`` (yarn), the generated package.json pins the merged
+            dependencies to a single version in that field. npm overrides
+            reference the direct dependencies (``$name``), see
+            :func:`pywebpack.helpers.compute_overrides`.
+        :param overrides_policy: Which packages to pin, see
+            :func:`pywebpack.helpers.compute_overrides`.
+        :param budgets: Performance budgets of the built entries, which take
+            precedence over the budgets declared by the bundles (see
+            :func:`pywebpack.budgets.check_budgets`).
         """
+        if overrides_field not in (None, "overrides", "resolutions"):
+            raise ValueError(f"Invalid overrides field: {overrides_field}")
         self._bundles_iter = bundles or []
         self._package_json_source_path = package_json_source_path
         self._allowed_copy_paths = allowed_copy_paths or []
+        self._execute_copy = execute_copy
+        self._copy_link = copy_link
+        self._intersect_dependencies = intersect_dependencies
+        self._allow_dependency_conflicts = allow_dependency_conflicts
+        self._overrides_field = overrides_field
+        self._overrides_policy = overrides_policy
+        self._budgets = budgets or {}
+        self._config_cache = None
         super(WebpackBundleProject, self).__init__(
             working_dir,
             project_template_dir=project_template_dir,
@@ -260,13 +416,25 @@ class WebpackBundleProject(WebpackTemplateProject):
         # (if it doesn't exist, we assume it to be a directory)
         return p.parent if p.is_file() else p
 
+    @staticmethod
+    def _is_allowed(path, allowed_index):
+        """Check if a path is inside one of the indexed allowed paths."""
+        return path in allowed_index or not allowed_index.isdisjoint(path.parents)
+
     @property
     def copy(self):
-        """Get (validated) instructions for copying assets around."""
+        """Get (validated) instructions for copying assets around.
+
+        Duplicated instructions (e.g. declared by several bundles) are only
+        included once.
+        """
         config_path = self._get_dir_path(self.config_path)
         allowed_paths = self.allowed_copy_paths
+        # Prefix index: a path is allowed if it or any of its parents is in it.
+        allowed_index = frozenset(allowed_paths)
 
         copy_instructions = []
+        seen = set()
         for bundle in self.bundles:
             for copy in bundle.copy:
                 if set(copy.keys()) != {"from", "to"}:
@@ -283,13 +451,9 @@ class WebpackBundleProject(WebpackTemplateProject):
                 to_path = self._get_dir_path(config_path.joinpath(to_str))
 
                 # If the set of allowed paths is not empty, perform sanity checks
-                if allowed_paths:
-                    from_path_ok = any(
-                        [from_path.is_relative_to(ap) for ap in allowed_paths]
-                    )
-                    to_path_ok = any(
-                        [to_path.is_relative_to(ap) for ap in allowed_paths]
-                    )
+                if allowed_index:
+                    from_path_ok = self._is_allowed(from_path, allowed_index)
+                    to_path_ok = self._is_allowed(to_path, allowed_index)
 
                     if not from_path_ok or not to_path_ok:
                         raise RuntimeError(
@@ -298,16 +462,124 @@ class WebpackBundleProject(WebpackTemplateProject):
                             f"Allowed paths: {allowed_paths}"
                         )
 
+                if (from_str, to_str) in seen:
+                    continue
+                seen.add((from_str, to_str))
                 copy_instructions.append({"from": from_str, "to": to_str})
 
         return copy_instructions
 
+    def _iter_copy_files(self):
+        """Resolve the copy instructions into ``(src, dst)`` file pairs."""
+        base_path = dirname(self.config_path)
+        for instruction in self.copy:
+            from_str, to_str = instruction["from"], instruction["to"]
+            if _GLOB_CHARS.search(from_str) or _TEMPLATE.search(to_str):
+                raise RuntimeError(
+                    f"Copy instruction {instruction} uses a glob or a template, "
+                    "which is only supported by webpack (execute_copy=False)."
+                )
+            src = join(base_path, from_str)
+            dst = join(base_path, to_str)
+            if isdir(src):
+                for fsrc, relpath in iter_files(src):
+                    yield fsrc, join(dst, relpath)
+            elif not exists(src):
+                raise RuntimeError(f"Copy source `{src}` does not exist.")
+            elif to_str.endswith("/") or not splitext(to_str)[1]:
+                # Like copy-webpack-plugin, a destination without extension
+                # is a directory.
+                yield src, join(dst, basename(src))
+            else:
+                yield src, dst
+
+    def copy_assets(self, force=False):
+        """Execute the copy instructions of the bundles.
+
+        The instructions follow the rules of copy-webpack-plugin: directories
+        are copied recursively into the destination, and files are copied
+        into the destination if it ends with a slash or has no extension,
+        otherwise to the destination path itself. Unlike the plugin, glob
+        sources and template destinations (e.g. ``[name].[ext]``) are not
+        supported and raise a :class:`RuntimeError`.
+
+        Overlapping instructions are coalesced so that each destination file
+        is only transferred once.
+
+        :param force: Transfer files even if the destination is up to date.
+        """
+        files = {}
+        for src, dst in self._iter_copy_files():
+            dst = normpath(dst)
+            prev_src = files.setdefault(dst, src)
+            if normpath(prev_src) != normpath(src):
+                raise RuntimeError(
+                    f"Conflicting copy instructions for `{dst}`: "
+                    f"`{prev_src}` and `{src}`."
+                )
+
+        storage = ParallelFileStorage(
+            dirname(self.config_path),
+            dirname(self.config_path),
+            link=self._copy_link,
+        )
+        storage.transfer((src, dst, force) for dst, src in files.items())
+
+    @property
+    def config_fingerprint(self):
+        """Fingerprint of everything the composed config is computed from.
+
+        It covers the user-supplied config, the entries, aliases and copy
+        instructions of each bundle and the allowed copy paths.
+        """
+        base = super(WebpackBundleProject, self).config
+        return content_hash(
+            {
+                "config": base,
+                "bundles": [[b.path, b.entry, b.aliases, b.copy] for b in self.bundles],
+                "allowed_copy_paths": self.allowed_copy_paths,
+            }
+        )
+
+    def _composed_config(self):
+        """Get the cached ``(config, hash)`` pair, recomputing it if stale."""
+        fingerprint = self.config_fingerprint
+        if self._config_cache is None or self._config_cache[0] != fingerprint:
+            # The entries may have changed since they were cached.
+            self._entry = None
+            # Never update the user-supplied config in place.
+            config = dict(super(WebpackBundleProject, self).config)
+            # Always validate the copy instructions, but only pass them to
+            # webpack if we are not executing them ourselves.
+            copy = self.copy
+            config.update(
+                {
+                    "entry": self.entry,
+                    "aliases": self.aliases,
+                    "copy": [] if self._execute_copy else copy,
+                }
+            )
+            self._config_cache = (fingerprint, config, content_hash(config))
+        return self._config_cache[1:]
+
     @property
     def config(self):
-        """Inject webpack entry points from bundles."""
-        config = super(WebpackBundleProject, self).config
-        config.update({"entry": self.entry, "aliases": self.aliases, "copy": self.copy})
-        return config
+        """Inject webpack entry points from bundles.
+
+        The composed config is cached per config fingerprint. A fresh copy
+        is returned on each access so callers may modify it freely. Each
+        access thus still hashes the user-supplied config and the bundles
+        (see :attr:`config_fingerprint`) and deep-copies the config, which
+        should be avoided in hot paths.
+        """
+        config, _hash = self._composed_config()
+        return deepcopy(config)
+
+    @property
+    def config_hash(self):
+        """Stable content hash of the composed config."""
+        _config, config_hash = self._composed_config()
+        return config_hash
 
     @property
     def aliases(self):
@@ -333,28 +605,94 @@ class WebpackBundleProject(WebpackTemplateProject):
             aliases["aliases"].update(bundle.aliases)
         return aliases["aliases"]
 
+    def _merge_dependencies(self, declarations):
+        """Merge declared dependencies with the options of the project."""
+        return merge_all_deps(
+            declarations,
+            intersect=self._intersect_dependencies,
+            best_effort=self._allow_dependency_conflicts,
+        )
+
+    @property
+    @cached
+    def dependency_report(self):
+        """Merge the dependencies of the source package.json and all bundles.
+
+        :return: Tuple ``(merged deps, list of conflicts)``, see
+            :func:`pywebpack.helpers.merge_all_deps`.
+        """
+        declarations = [(self.package_json_source_path, self.package_json_source)]
+        declarations += [(b.path, b.dependencies) for b in self.bundles]
+        return self._merge_dependencies(declarations)
+
+    @property
+    def dependency_conflicts(self):
+        """Get all conflicting dependencies (of bundles and package.json)."""
+        return self.dependency_report[1]
+
     @property
     @cached
     def dependencies(self):
         """Get package.json dependencies."""
-        res = {"dependencies": {}, "devDependencies": {}, "peerDependencies": {}}
-        for b in self.bundles:
-            try:
-                merge_deps(res, b.dependencies)
-            except MergeConflictError as e:
-                conflicting = b.path
-                new_msg = f"{e.args[0]}. Conflicting dependency found in {conflicting}"
-                raise MergeConflictError(new_msg)
-        return res
+        declarations = [(b.path, b.dependencies) for b in self.bundles]
+        merged, _conflicts = self._merge_dependencies(declarations)
+        return merged
 
     @property
-    @cached
     def package_json(self):
         """Merge bundle dependencies into ``package.json``."""
         # Reads package.json from the project_template_dir and merges in
         # bundle dependencies. Note, that package.json is not symlinked
         # because then we risk changing the source package.json automatically.
-        return merge_deps(self.package_json_source, self.dependencies)
+        package_json = deepcopy(self.package_json_source)
+        package_json.update(deepcopy(self.dependency_report[0]))
+        if self._overrides_field:
+            # Explicit overrides from the source package.json take precedence.
+            overrides = compute_overrides(
+                package_json,
+                self._overrides_policy,
+                reference=self._overrides_field == "overrides",
+            )
+            overrides.update(package_json.get(self._overrides_field, {}))
+            package_json[self._overrides_field] = overrides
+        return package_json
+
+    @property
+    def budgets(self):
+        """Performance budgets of the bundles and of the project."""
+        budgets = {}
+        for bundle in self.bundles:
+            budgets.update(bundle.budgets)
+        budgets.update(self._budgets)
+        return budgets
+
+    def check_budgets(
+        self,
+        output_dir,
+        manifest="manifest.json",
+        public_path=None,
+        fail=True,
+        loader=None,
+    ):
+        """Check the built entries against their performance budgets.
+
+        See :func:`pywebpack.budgets.check_budgets` for the parameters.
+
+        :param fail: If ``True``, entries exceeding their budget (or listing
+            missing files) raise a
+            :class:`~pywebpack.errors.BudgetExceededError`, otherwise a
+            warning is issued.
+        :return: The :class:`~pywebpack.budgets.BudgetReport`.
+        """
+        report = check_budgets(
+            self.budgets, output_dir, manifest, public_path=public_path, loader=loader
+        )
+        if not report.ok:
+            message = f"Performance budgets exceeded:\n{report}"
+            if fail:
+                raise BudgetExceededError(message, report=report)
+            warnings.warn(message)
+        return report
 
     def collect(self, force=None):
         """Collect asset files from bundles."""
@@ -378,3 +716,13 @@ class WebpackBundleProject(WebpackTemplateProject):
         # Write package.json (with collected dependencies)
         with open(self.npmpkg.package_json_path, "w") as fp:
             json.dump(package_json, fp, indent=2, sort_keys=True)
+
+    def build(self, *args):
+        """Run build script.
+
+        The copy instructions are executed first if ``execute_copy`` is set,
+        as their sources are often installed npm packages.
+        """
+        if self._execute_copy:
+            self.copy_assets()
+        return super(WebpackBundleProject, self).build(*args)
@@ -0,0 +1,354 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Semantic versioning API."""
+
+import re
+from functools import lru_cache, total_ordering
+
+# https://semver.org/#is-there-a-suggested-regular-expression-regex-to-check-a-semver-string
+# Differences:
+# - `^\D*`: ignores the first not numberic char (major version), e.g. ~ or <
+# - minor and patch versions are optional
+SEM_VER = r"^\D*(?P<major>0|[1-9]\d*)\.?(?P<minor>0|[1-9]\d*)?\.?(?P<patch>0|[1-9]\d*)?(?:-(?P<prerelease>(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*)(?:\.(?:0|[1-9]\d*|\d*[a-zA-Z-][0-9a-zA-Z-]*))*))?(?:\+(?P<buildmetadata>[0-9a-zA-Z-]+(?:\.[0-9a-zA-Z-]+)*))?$"
+
+_sem_ver_re = re.compile(SEM_VER)
+
+
+def _prerelease_key(prerelease):
+    """Sort key for pre-release tags.
+
+    Complies with specification: <https://semver.org/#spec-item-11>. A version
+    without pre-release has a higher precedence than one with pre-release.
+    """
+    if not prerelease:
+        return (1,)
+    return (0,) + tuple(
+        (0, int(tag), "") if tag.isdigit() else (1, 0, tag)
+        for tag in prerelease.split(".")
+    )
+
+
+@total_ordering
+class Version(object):
+    """Semantic version with total ordering.
+
+    Build metadata is ignored, as mandated by the specification.
+    """
+
+    __slots__ = ("major", "minor", "patch", "prerelease", "_key")
+
+    def __init__(self, major, minor=0, patch=0, prerelease=""):
+        """Initialize version."""
+        self.major = major
+        self.minor = minor
+        self.patch = patch
+        self.prerelease = prerelease
+        self._key = (major, minor, patch, _prerelease_key(prerelease))
+
+    def __eq__(self, other):
+        """Compare versions for equality."""
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self._key == other._key
+
+    def __lt__(self, other):
+        """Compare versions by precedence."""
+        if not isinstance(other, Version):
+            return NotImplemented
+        return self._key < other._key
+
+    def __hash__(self):
+        """Hash of the version."""
+        return hash(self._key)
+
+    def __str__(self):
+        """Version as a string."""
+        v = f"{self.major}.{self.minor}.{self.patch}"
+        return f"{v}-{self.prerelease}" if self.prerelease else v
+
+    def __repr__(self):
+        """Representation of the version."""
+        return f"Version('{self}')"
+
+
+@lru_cache(maxsize=4096)
+def parse_version(version):
+    """Parse a semantic version.
+
+    Parsed versions are cached, so parsing the same string many times (e.g.
+    when merging the dependencies of many bundles) is cheap.
+
+    :param version: Version string, optionally prefixed (e.g. ``^1.2.3``).
+    :return: A :class:`Version`.
+    """
+    match = _sem_ver_re.match(version)
+    if not match:
+        raise ValueError(f"{version} is not a valid semantic version.")
+    return Version(
+        int(match.group("major")),
+        int(match.group("minor") or 0),
+        int(match.group("patch") or 0),
+        match.group("prerelease") or "",
+    )
+
+
+def max_versions(versions):
+    """Given an iterable of semver strings, return the max version.
+
+    When several strings have the same precedence, the first one is returned.
+    """
+    return max(versions, key=parse_version)
+
+
+#
+# Ranges
+#
+_partial_re = re.compile(
+    r"^v?(?P<major>\d+|[xX*])"
+    r"(?:\.(?P<minor>\d+|[xX*]))?"
+    r"(?:\.(?P<patch>\d+|[xX*]))?"
+    r"(?:-(?P<prerelease>[0-9A-Za-z.-]+))?"
+    r"(?:\+[0-9A-Za-z.-]+)?$"
+)
+_operator_re = re.compile(r"^(?P<op><=|>=|<|>|=|~>|~|\^)?(?P<version>.*)$")
+_operator_space_re = re.compile(r"(<=|>=|<|>|=|~>|~|\^)\s+")
+
+
+def _parse_partial(version):
+    """Parse a partial version, e.g. ``1.2``, ``1.x`` or ``1.2.3-beta``.
+
+    :return: Tuple ``(major, minor, patch, prerelease)`` where missing or
+        wildcard parts are ``None``.
+    """
+    match = _partial_re.match(version)
+    if not match:
+        raise ValueError(f"{version} is not a valid version range.")
+    parts = []
+    for name in ("major", "minor", "patch"):
+        part = match.group(name)
+        if part is None or part in "xX*":
+            break
+        parts.append(int(part))
+    parts += [None] * (3 - len(parts))
+    prerelease = match.group("prerelease") or "" if parts[2] is not None else ""
+    return tuple(parts) + (prerelease,)
+
+
+def _floor(major, minor, patch, prerelease):
+    """Lowest version matching a partial version."""
+    return Version(major or 0, minor or 0, patch or 0, prerelease)
+
+
+def _bump(major, minor, patch):
+    """Lowest version above all the versions matching a partial version."""
+    if minor is None:
+        return Version(major + 1, 0, 0, "0")
+    if patch is None:
+        return Version(major, minor + 1, 0, "0")
+    return Version(major, minor, patch + 1, "0")
+
+
+class Interval(object):
+    """Continuous set of versions between an optional lower and upper bound.
+
+    Bounds are ``(version, inclusive)`` tuples, or ``None`` if unbounded.
+    """
+
+    __slots__ = ("lower", "upper")
+
+    def __init__(self, lower=None, upper=None):
+        """Initialize interval."""
+        self.lower = lower
+        self.upper = upper
+
+    @property
+    def is_empty(self):
+        """Check if no version is in the interval."""
+        if self.lower is None or self.upper is None:
+            return False
+        (lo, lo_incl), (hi, hi_incl) = self.lower, self.upper
+        return lo > hi or (lo == hi and not (lo_incl and hi_incl))
+
+    def intersection(self, other):
+        """Intersect with another interval."""
+        lower, upper = self.lower, self.upper
+        if other.lower is not None:
+            # Higher version wins; for the same version, exclusive wins.
+            if lower is None or (other.lower[0], not other.lower[1]) > (
+                lower[0],
+                not lower[1],
+            ):
+                lower = other.lower
+        if other.upper is not None:
+            # Lower version wins; for the same version, exclusive wins.
+            if upper is None or other.upper < upper:
+                upper = other.upper
+        return Interval(lower, upper)
+
+    def __eq__(self, other):
+        """Compare intervals."""
+        if not isinstance(other, Interval):
+            return NotImplemented
+        return (self.lower, self.upper) == (other.lower, other.upper)
+
+    def __hash__(self):
+        """Hash of the interval."""
+        return hash((self.lower, self.upper))
+
+    def __str__(self):
+        """Interval in npm range syntax."""
+        if self.lower is None and self.upper is None:
+            return "*"
+        if self.lower == self.upper:
+            return str(self.lower[0])
+        out = []
+        if self.lower is not None:
+            out.append((">=" if self.lower[1] else ">") + str(self.lower[0]))
+        if self.upper is not None:
+            out.append(("<=" if self.upper[1] else "<") + str(self.upper[0]))
+        return " ".join(out)
+
+
+def _parse_comparator(comparator):
+    """Parse a single comparator into an interval."""
+    match = _operator_re.match(comparator)
+    op, version = match.group("op") or "", match.group("version")
+    major, minor, patch, prerelease = _parse_partial(version)
+    floor = (_floor(major, minor, patch, prerelease), True)
+
+    if major is None:
+        # Wildcard, e.g. `*` or `>=x`: anything, or nothing for `<*`/`>*`.
+        if op in ("<", ">"):
+            return Interval((Version(0, 0, 0), False), (Version(0, 0, 0), False))
+        return Interval()
+    if op in ("", "="):
+        if patch is not None:
+            return Interval(floor, floor)
+        return Interval(floor, (_bump(major, minor, patch), False))
+    if op in ("~", "~>"):
+        return Interval(floor, (_bump(major, minor, None), False))
+    if op == "^":
+        if major != 0 or minor is None:
+            upper = _bump(major, None, None)
+        elif minor != 0 or patch is None:
+            upper = _bump(major, minor, None)
+        else:
+            upper = _bump(major, minor, patch)
+        return Interval(floor, (upper, False))
+    if op == ">=":
+        return Interval(lower=floor)
+    if op == "<":
+        return Interval(
+            upper=(
+                floor[0] if patch is not None else Version(major, minor or 0, 0, "0"),
+                False,
+            )
+        )
+    if op == ">":
+        if patch is not None:
+            return Interval(lower=(floor[0], False))
+        upper = _bump(major, minor, patch)
+        return Interval(lower=(Version(upper.major, upper.minor, upper.patch), True))
+    # op == "<="
+    if patch is not None:
+        return Interval(upper=(floor[0], True))
+    return Interval(upper=(_bump(major, minor, patch), False))
+
+
+def _parse_comparator_set(comparators):
+    """Parse space-separated comparators (including hyphen ranges)."""
+    tokens = _operator_space_re.sub(r"\1", comparators).split()
+    interval = Interval()
+    i = 0
+    while i < len(tokens):
+        if i + 2 < len(tokens) and tokens[i + 1] == "-":
+            # Hyphen range, e.g. `1.2.3 - 2.3`.
+            lower = _parse_comparator(">=" + tokens[i])
+            upper = _parse_comparator("<=" + tokens[i + 2])
+            current = lower.intersection(upper)
+            i += 3
+        else:
+            current = _parse_comparator(tokens[i])
+            i += 1
+        interval = interval.intersection(current)
+    return interval
+
+
+class Range(object):
+    """Set of versions described by an npm version range.
+
+    Supports the npm range syntax: primitive comparators (``<``, ``<=``,
+    ``>``, ``>=``, ``=``), hyphen ranges, x-ranges, tilde and caret ranges,
+    and ``||`` unions. Pre-release tags only take part in the ordering of
+    versions; npm's extra rules on matching pre-releases are not applied.
+    """
+
+    __slots__ = ("intervals",)
+
+    def __init__(self, intervals):
+        """Initialize range from (possibly empty) intervals."""
+        self.intervals = frozenset(i for i in intervals if not i.is_empty)
+
+    @property
+    def is_empty(self):
+        """Check if no version satisfies the range."""
+        return not self.intervals
+
+    def intersection(self, other):
+        """Intersect with another range."""
+        return Range(a.intersection(b) for a in self.intervals for b in other.intervals)
+
+    def __eq__(self, other):
+        """Compare ranges."""
+        if not isinstance(other, Range):
+            return NotImplemented
+        return self.intervals == other.intervals
+
+    def __hash__(self):
+        """Hash of the range."""
+        return hash(self.intervals)
+
+    def __str__(self):
+        """Range in npm range syntax."""
+        intervals = sorted(
+            self.intervals, key=lambda i: i.lower or (Version(0, 0, 0), True)
+        )
+        return " || ".join(str(i) for i in intervals)
+
+    def __repr__(self):
+        """Representation of the range."""
+        return f"Range('{self}')"
+
+
+@lru_cache(maxsize=4096)
+def parse_range(spec):
+    """Parse an npm version range.
+
+    :param spec: Range, e.g. ``^1.2.3``, ``>=1.0 <2`` or ``1.x || 2.x``.
+    :return: A :class:`Range`.
+    """
+    return Range(_parse_comparator_set(s) for s in spec.split("||"))
+
+
+def intersect_ranges(specs):
+    """Compute the narrowest range satisfying all the given ranges.
+
+    If the intersection is one of the given ranges, its original spelling is
+    returned (e.g. ``^1.2.3`` rather than ``>=1.2.3 <2.0.0-0``).
+
+    :param specs: Iterable of npm version ranges.
+    :return: The narrowest range, or ``None`` if no version satisfies all the
+        given ranges.
+    """
+    specs = list(specs)
+    ranges = [parse_range(s) for s in specs]
+    result = ranges[0]
+    for r in ranges[1:]:
+        result = result.intersection(r)
+        if result.is_empty:
+            return None
+    for spec, r in zip(specs, ranges):
+        if r == result:
+            return spec
+    return str(result)
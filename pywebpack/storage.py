@@ -3,9 +3,21 @@
 
 """Storage API."""
 
-from os import listdir, makedirs, remove, symlink, walk
-from os.path import dirname, exists, getmtime, isfile, islink, join, realpath, relpath
-from shutil import copy
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from os import link, listdir, makedirs, remove, stat, symlink, walk
+from os.path import (
+    dirname,
+    exists,
+    getmtime,
+    isfile,
+    islink,
+    join,
+    realpath,
+    relpath,
+    samefile,
+)
+from shutil import copy, copy2
 
 
 def iter_files(folder):
@@ -75,6 +87,101 @@ class FileStorage(object):
             self._copyfile(fsrc, fdst, force=relpath in force)
 
 
+def file_digest(path, chunk_size=1 << 16):
+    """Compute the SHA-1 digest of a file."""
+    h = hashlib.sha1()
+    with open(path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def tree_digest(folder):
+    """Compute the SHA-1 digest of the relative paths and contents of a folder."""
+    h = hashlib.sha1()
+    for path, name in sorted(iter_files(folder), key=lambda f: f[1]):
+        h.update(f"{name}\0{file_digest(path)}\0".encode("utf-8"))
+    return h.hexdigest()
+
+
+class ParallelFileStorage(FileStorage):
+    """Storage class that transfers files in parallel.
+
+    Files are skipped when the destination is up to date, i.e. when it is the
+    same file (hardlink), or has the same size and is not older than the
+    source. With ``checksum`` enabled, files with the same size but a different
+    modification time are compared by content before being transferred.
+
+    With ``link`` enabled, files are hardlinked instead of copied whenever the
+    source and destination are on the same filesystem. Otherwise, files are
+    copied with :func:`shutil.copy2`, which uses the kernel's zero-copy
+    primitives where the platform supports them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize storage."""
+        self.max_workers = kwargs.pop("max_workers", None)
+        self.link = kwargs.pop("link", False)
+        self.checksum = kwargs.pop("checksum", False)
+        super(ParallelFileStorage, self).__init__(*args, **kwargs)
+
+    def _is_uptodate(self, src, dst):
+        """Check if the destination file is up to date with the source."""
+        if samefile(src, dst):
+            return True
+        src_stat, dst_stat = stat(src), stat(dst)
+        if src_stat.st_size != dst_stat.st_size:
+            return False
+        if dst_stat.st_mtime >= src_stat.st_mtime:
+            return True
+        return self.checksum and file_digest(src) == file_digest(dst)
+
+    def _copyfile(self, src, dst, force=False):
+        """Transfer file from source to destination."""
+        if exists(dst):
+            if not force and self._is_uptodate(src, dst):
+                return
+            remove(dst)
+        if self.link:
+            try:
+                link(src, dst)
+                return
+            except OSError:
+                # E.g. cross-device link, fall back to a copy.
+                pass
+        copy2(src, dst)
+
+    def transfer(self, files):
+        """Transfer files in parallel.
+
+        :param files: Iterable of ``(src, dst, force)`` tuples.
+        """
+        files = list(files)
+        # Create destination directories up front to avoid races.
+        for dstdir in {dirname(dst) for _src, dst, _force in files}:
+            if not exists(dstdir):
+                makedirs(dstdir)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(self._copyfile, src, dst, force=force)
+                for src, dst, force in files
+            ]
+            for future in futures:
+                # Re-raise any error from the workers.
+                future.result()
+
+    def run(self, force=None, skip=None):
+        """Copy files from source to destination."""
+        force = force or {}
+        skip = skip or []
+        self.transfer(
+            (fsrc, join(self.dstdir, relpath), relpath in force)
+            for fsrc, relpath in self
+            if relpath not in skip
+        )
+
+
 class LinkStorage(FileStorage):
     """Storage class that link files."""
 
@@ -112,6 +112,18 @@ def manifest_path(manifestsdir):
     return join(manifestsdir, "manifest.json")
 
 
+@pytest.fixture()
+def vite_path(manifestsdir):
+    """Vite manifest."""
+    return join(manifestsdir, "vite.json")
+
+
+@pytest.fixture()
+def assets_manifest_path(manifestsdir):
+    """webpack-assets-manifest manifest."""
+    return join(manifestsdir, "assets-manifest.json")
+
+
 @pytest.fixture(autouse=True, scope="session")
 def check_webpack_installation():
     """Check if Webpack is installed locally or globally."""
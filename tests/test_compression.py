@@ -0,0 +1,63 @@
+# SPDX-FileCopyrightText: 2026 CERN.
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Compression tests."""
+
+import gzip
+import json
+import os
+from os.path import exists, join
+
+import pytest
+
+from pywebpack import ManifestLoader
+from pywebpack.compression import available_formats, precompress
+
+
+def test_precompress(tmpdir):
+    """Test precompression of the files of a manifest."""
+    os.makedirs(join(tmpdir, "js"))
+    files = {"js/app.js": "var a = 1;" * 100, "app.css": "a {}", "logo.png": "png"}
+    for name, content in files.items():
+        with open(join(tmpdir, name), "w") as fp:
+            fp.write(content)
+    with open(join(tmpdir, "manifest.json"), "w") as fp:
+        json.dump(
+            {
+                "status": "built",
+                "files": {
+                    "app": ["/static/js/app.js", "/static/app.css"],
+                    "logo": ["/static/logo.png"],
+                },
+            },
+            fp,
+        )
+
+    sizes = precompress(tmpdir, formats=["gzip"], public_path="/static/")
+    assert set(sizes) == {"/static/js/app.js", "/static/app.css"}
+    assert not exists(join(tmpdir, "logo.png.gz"))
+    with gzip.open(join(tmpdir, "js/app.js.gz")) as fp:
+        assert fp.read().decode() == files["js/app.js"]
+    assert sizes["/static/js/app.js"]["size"] == 1000
+    assert sizes["/static/js/app.js"]["gzip"] < 100
+
+    # Unchanged files are skipped.
+    mtime = os.stat(join(tmpdir, "js/app.js.gz")).st_mtime_ns
+    with open(join(tmpdir, "app.css"), "w") as fp:
+        fp.write("b {}")
+    sizes = precompress(tmpdir, formats=["gzip"], public_path="/static/")
+    assert os.stat(join(tmpdir, "js/app.js.gz")).st_mtime_ns == mtime
+    with gzip.open(join(tmpdir, "app.css.gz")) as fp:
+        assert fp.read() == b"b {}"
+
+    # Sizes are set as entry metadata.
+    manifest = ManifestLoader(sizes=True).load(join(tmpdir, "manifest.json"))
+    metadata = manifest["app"].metadata
+    assert metadata["size"] == 1004
+    assert metadata["gzip"] == sum(s["gzip"] for s in sizes.values())
+    assert set(metadata["files"]) == set(sizes)
+    assert manifest["logo"].metadata == {"files": {}}
+    assert ManifestLoader().load(join(tmpdir, "manifest.json"))["app"].metadata is None
+
+    pytest.raises(ValueError, precompress, tmpdir, formats=["zstd"])
+    assert "gzip" in available_formats()
@@ -4,18 +4,46 @@
 
 """Module tests."""
 
+import asyncio
+import gc
+import json
+import os
+import threading
+import time
+import tracemalloc
+from os.path import join
+
 import pytest
 
 from pywebpack import (
+    CachedManifestLoader,
     InvalidManifestError,
     Manifest,
     ManifestEntry,
     ManifestLoader,
     UnfinishedManifestError,
     UnsupportedExtensionError,
+    UnsupportedManifestError,
+    ViteManifestFactory,
+    WebpackAssetsManifestFactory,
     WebpackBundleTrackerFactory,
     WebpackManifestFactory,
     WebpackYamFactory,
+    manifests,
+)
+from pywebpack.manifests import (
+    CompiledManifest,
+    CompiledManifestLoader,
+    InlinePolicy,
+    ManifestConflictError,
+    ManifestFactory,
+    ManifestSet,
+    ManifestTimeoutError,
+    compile_manifest,
+    decode_json,
+    preload_hints,
+    wait_for_manifest,
+    wait_for_manifest_async,
 )
 
 
@@ -45,6 +73,54 @@ def test_render(exmanif):
     )
 
 
+def test_render_entries():
+    """Test rendering several entries with shared chunks."""
+    m = Manifest()
+    m.add(ManifestEntry("app.js", ["/runtime.js", "/vendor.js", "/app.js"]))
+    m.add(ManifestEntry("admin.js", ["/runtime.js", "/vendor.js", "/admin.js"]))
+    m.add(ManifestEntry("app.css", ["/vendor.css", "/app.css"]))
+
+    html = m.render_entries(["app.js", "admin.js", "app.css"])
+    assert html == (
+        '<link rel="stylesheet" href="/vendor.css" />'
+        '<link rel="stylesheet" href="/app.css" />'
+        '<script src="/runtime.js"></script>'
+        '<script src="/vendor.js"></script>'
+        '<script src="/app.js"></script>'
+        '<script src="/admin.js"></script>'
+    )
+    # Memoized per tuple of entries.
+    assert m.render_entries(("app.js", "admin.js", "app.css")) is html
+    pytest.raises(KeyError, m.render_entries, ["missing.js"])
+
+
+def test_preload_hints():
+    """Test preload links and headers."""
+    m = Manifest()
+    m.add(ManifestEntry("app.js", ["/vendor.js", "/app.js"]))
+    m.add(ManifestEntry("app.css", ["/app.css", "/font.woff2", "/logo.png"]))
+    m.add(ManifestEntry("admin.js", ["/vendor.js", "/admin.js"]))
+
+    assert m.preload_links(["app.css", "app.js"]) == (
+        '<link href="/app.css" rel="preload" as="style" />'
+        '<link href="/font.woff2" rel="preload" as="font" type="font/woff2"'
+        " crossorigin />"
+        '<link href="/vendor.js" rel="preload" as="script" />'
+        '<link href="/app.js" rel="preload" as="script" />'
+    )
+    header = m.link_header(["app.js", "admin.js"], modules=True)
+    assert header == (
+        "</vendor.js>; rel=modulepreload, </app.js>; rel=modulepreload, "
+        "</admin.js>; rel=modulepreload"
+    )
+    assert m.link_header(["app.js", "admin.js"], modules=True) is header
+    assert m.link_header(["app.css"], crossorigin="anonymous") == (
+        "</app.css>; rel=preload; as=style; crossorigin=anonymous, "
+        '</font.woff2>; rel=preload; as=font; type="font/woff2"; '
+        "crossorigin=anonymous"
+    )
+
+
 def test_manifest_add_same_name():
     """Test add with same name."""
     m = Manifest()
@@ -66,6 +142,45 @@ def test_invalid_ext():
     pytest.raises(UnsupportedExtensionError, m.script.render)
 
 
+def test_render_memoized(exmanif):
+    """Test that entries are only rendered once."""
+    html = exmanif.script.render()
+    assert exmanif.script.render() is html
+    assert str(exmanif.script) is html
+
+
+def test_prerender(tmpdir):
+    """Test reporting unsupported extensions at load time."""
+    path = join(tmpdir, "manifest.json")
+    with open(path, "w") as fp:
+        json.dump({"app.js": "app.123.js", "logo.png": "logo.123.png"}, fp)
+
+    assert ManifestLoader().load(path)["app.js"]
+    pytest.raises(UnsupportedExtensionError, ManifestLoader(prerender=True).load, path)
+    pytest.raises(
+        UnsupportedExtensionError, WebpackManifestFactory(prerender=True).load, path
+    )
+
+
+def test_load_html(yam_path, tmpdir):
+    """Test loading a manifest as a frozen mapping of HTML."""
+    html = ManifestLoader(prerender=True).load_html(yam_path)
+    assert html["app"] == '<script src="rel/path/to/some_file.js"></script>'
+    with pytest.raises(TypeError):
+        html["app"] = ""
+
+    # Entries which cannot be rendered are left out.
+    path = join(tmpdir, "manifest.json")
+    with open(path, "w") as fp:
+        json.dump({"main.js": "main.1.js", "logo.png": "logo.1.png"}, fp)
+    assert dict(ManifestLoader().load_html(path)) == {
+        "main.js": '<script src="main.1.js"></script>'
+    }
+    compile_manifest(path)
+    assert set(CompiledManifestLoader().load_html(path)) == {"main.js"}
+    pytest.raises(UnsupportedExtensionError, ManifestLoader(prerender=True).load, path)
+
+
 def test_factory(bundletracker_path, yam_path, manifest_path):
     """Test factories."""
     m = WebpackBundleTrackerFactory().load(bundletracker_path)
@@ -91,9 +206,480 @@ def test_factory_invalid(bundletracker_invalid_path, yam_invalid_path):
     pytest.raises(UnfinishedManifestError, WebpackYamFactory().load, yam_invalid_path)
 
 
+def test_inline(tmpdir):
+    """Test inlining small files."""
+    files = {
+        "app.js": "alert('</script>');",
+        "app.css": "a {}",
+        "big.css": "b {}" * 100,
+        "logo.svg": "<svg/>",
+    }
+    for name, content in files.items():
+        with open(join(tmpdir, name), "w") as fp:
+            fp.write(content)
+    m = Manifest()
+    m.add(ManifestEntry("app.js", ["/static/app.js"]))
+    m.add(ManifestEntry("app.css", ["/static/app.css", "/static/big.css"]))
+    m.add(ManifestEntry("logo", ["/static/logo.svg", "/static/missing.css"]))
+
+    inline = InlinePolicy(tmpdir, max_size=100, public_path="/static/")
+    assert m["app.js"].render(inline=inline) == "<script>alert('<\\/script>');</script>"
+    assert m.render_entries(["app.css"], inline=inline) == (
+        '<style>a {}</style><link rel="stylesheet" href="/static/big.css" />'
+    )
+    # Unsupported and missing files are not inlined.
+    assert inline.content(m["logo"], "/static/logo.svg") is not None
+    pytest.raises(UnsupportedExtensionError, m["logo"].render, inline=inline)
+    assert m["logo"].render_path("/static/missing.css", inline).startswith("<link")
+
+    # Without a policy, the memoized HTML is used.
+    assert m["app.js"].render() == '<script src="/static/app.js"></script>'
+
+    # Content is read again when the file changes.
+    with open(join(tmpdir, "app.css"), "w") as fp:
+        fp.write("c {}")
+    os.utime(join(tmpdir, "app.css"), ns=(1, 1))
+    assert m["app.css"].render(inline=inline).startswith("<style>c {}</style>")
+
+    # Explicitly included entries are inlined regardless of their size.
+    inline = InlinePolicy(tmpdir, include=["app.css"], public_path="/static/")
+    assert m["app.css"].render(inline=inline).count("<style>") == 2
+    assert m["app.js"].render(inline=inline).startswith("<script src")
+
+
+def test_variants(tmpdir):
+    """Test combining the manifests of a modern and a legacy build."""
+    modern_path, legacy_path = join(tmpdir, "modern.json"), join(tmpdir, "legacy.json")
+    with open(modern_path, "w") as fp:
+        json.dump({"app.js": "/app.es2020.js", "app.css": "/app.css"}, fp)
+    with open(legacy_path, "w") as fp:
+        json.dump({"app.js": "/app.es5.js", "polyfills.js": "/polyfills.js"}, fp)
+
+    loader = CachedManifestLoader()
+    m = loader.load_variants(
+        modern_path, legacy_path, attrs={"app.js": ["async"], "*": ["defer"]}
+    )
+    assert m["app.js"].render() == (
+        '<script async type="module" src="/app.es2020.js"></script>'
+        '<script async nomodule src="/app.es5.js"></script>'
+    )
+    assert m["app.css"].render() == '<link rel="stylesheet" href="/app.css" />'
+    assert m["polyfills.js"].render() == '<script defer src="/polyfills.js"></script>'
+    assert m.render_entries(["app.css", "app.js"]).endswith(
+        '<script async nomodule src="/app.es5.js"></script>'
+    )
+    # Modern browsers do not preload the legacy scripts.
+    assert [p for p, _ in preload_hints([m["app.js"]])] == ["/app.es2020.js"]
+
+    # The combined manifest is reused while both manifests are unchanged.
+    assert (
+        loader.load_variants(
+            modern_path, legacy_path, attrs={"app.js": ["async"], "*": ["defer"]}
+        )
+        is m
+    )
+    assert loader.load_variants(modern_path, legacy_path) is not m
+
+
+def test_vite_manifest(vite_path):
+    """Test Vite manifests."""
+    m = ManifestLoader().load(vite_path)
+    assert {e.name for e in m} == {"views/bar.js", "views/foo.js"}
+
+    # Stylesheets of the imported chunks are included, imports are transitive.
+    foo = m["views/foo.js"]
+    assert list(foo) == [
+        "/assets/foo-5UjPuW-k.css",
+        "/assets/shared-ChJ_j-JJ.css",
+        "/assets/foo-BRBmoGS9.js",
+    ]
+    assert foo.imports == ("/assets/util-4ZvAu3ia.js", "/assets/shared-B7PI925R.js")
+    assert foo.render() == (
+        '<link rel="stylesheet" href="/assets/foo-5UjPuW-k.css" />'
+        '<link rel="stylesheet" href="/assets/shared-ChJ_j-JJ.css" />'
+        '<script type="module" src="/assets/foo-BRBmoGS9.js"></script>'
+        '<link rel="modulepreload" href="/assets/util-4ZvAu3ia.js" />'
+        '<link rel="modulepreload" href="/assets/shared-B7PI925R.js" />'
+    )
+
+    # Shared imports are only rendered once.
+    html = m.render_entries(["views/foo.js", "views/bar.js"])
+    assert html.count("shared-B7PI925R.js") == 1
+    assert html.endswith(
+        '<link rel="modulepreload" href="/assets/shared-B7PI925R.js" />'
+    )
+    assert [p for p, _ in preload_hints([m["views/bar.js"]])] == [
+        "/assets/shared-ChJ_j-JJ.css",
+        "/assets/bar-gkvgaI9m.js",
+        "/assets/util-4ZvAu3ia.js",
+        "/assets/shared-B7PI925R.js",
+    ]
+    assert "rel=modulepreload" in m.link_header(["views/bar.js"])
+
+    # Dynamic imports are opt-in.
+    class Factory(ViteManifestFactory):
+        base = "/static/"
+        preload_dynamic = True
+
+    m = Factory().load(vite_path)
+    assert m["views/bar.js"].imports[-1] == "/static/assets/baz-B2H3sXNv.js"
+
+
+def test_assets_manifest(assets_manifest_path, tmpdir):
+    """Test webpack-assets-manifest manifests."""
+    m = ManifestLoader().load(assets_manifest_path)
+    assert {e.name for e in m} == {"app.js", "app.css", "admin.js"}
+    assert m["app.js"].render() == (
+        '<script src="/static/runtime.c1d2e3f4.js"></script>'
+        '<script src="/static/app.3f9a5b7d.js"></script>'
+        '<link rel="preload" href="/static/chart.5a6b7c8d.js" as="script" />'
+    )
+    assert list(m["admin.js"]) == ["/static/admin.0a1b2c3d.js"]
+    assert WebpackAssetsManifestFactory().load(assets_manifest_path)["app.css"]
+
+    # The entrypoints option of the plugin is required.
+    path = join(tmpdir, "assets.json")
+    with open(path, "w") as fp:
+        json.dump({"entrypoints": {"app": ["app.js"]}}, fp)
+    pytest.raises(InvalidManifestError, WebpackAssetsManifestFactory().load, path)
+
+
 def test_iter_manifest(exmanif):
     assert {m.name for m in exmanif} == {"script", "styles"}
 
 
 def test_iter_manifest_entry(exmanif):
     assert {p for p in exmanif.script} == {"/a.js", "/b.js"}
+
+
+def test_cached_loader(manifest_path, tmpdir):
+    """Test the stat-checked manifest cache."""
+    path = join(tmpdir, "manifest.json")
+    with open(manifest_path) as fp:
+        data = json.load(fp)
+
+    def write(data):
+        # Replace the file atomically, as a build would.
+        with open(path + ".tmp", "w") as fp:
+            json.dump(data, fp)
+        os.replace(path + ".tmp", path)
+
+    write(data)
+    loader = CachedManifestLoader(check_interval=0)
+    m = loader.load(path)
+    assert loader.load(path) is m
+
+    # Not revalidated within the check interval.
+    loader.check_interval = 3600
+    write(dict(data, other="other.js"))
+    assert loader.load(path) is m
+
+    # Reparsed once the file was replaced.
+    loader.check_interval = 0
+    m2 = loader.load(path)
+    assert m2 is not m
+    assert m2.other
+
+    # The previous manifest is served while another thread reparses it.
+    write(data)
+    lock = loader._locks[path]
+    lock.acquire()
+    try:
+        assert loader.load(path) is m2
+    finally:
+        lock.release()
+    assert loader.load(path) is not m2
+
+    # The previous manifest is served while the new one is being built, and
+    # the file is only reparsed once per check interval.
+    m3 = loader.load(path)
+    parsed = []
+    create = loader._create
+    loader._create = lambda *args: parsed.append(True) or create(*args)
+    loader.check_interval = 3600
+    for content in ['{"status": "building", "files": null}', '{"app.js": ']:
+        with open(path + ".tmp", "w") as fp:
+            fp.write(content)
+        os.replace(path + ".tmp", path)
+        # Last checked longer than the check interval ago.
+        key, manifest, _checked = loader._cache[path]
+        loader._cache[path] = (key, manifest, time.monotonic() - 7200)
+        assert loader.load(path) is m3
+        assert loader.load(path) is m3
+    assert len(parsed) == 2
+
+
+def test_cached_loader_threads(manifest_path):
+    """Test concurrent loads of the same manifest."""
+    loader = CachedManifestLoader()
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(loader.load(manifest_path)))
+        for _i in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(m) for m in results}) == 1
+
+
+def test_loader_detection(bundletracker_path, yam_path, manifest_path, monkeypatch):
+    """Test detecting the manifest type from its top-level keys."""
+    loader = ManifestLoader()
+    assert loader.detect({"status": "done", "chunks": {}}) == [
+        WebpackBundleTrackerFactory,
+        WebpackManifestFactory,
+    ]
+    assert loader.detect({"status": "built", "files": {}})[0] == WebpackYamFactory
+    assert loader.detect([]) == []
+
+    for path, factory in [
+        (bundletracker_path, WebpackBundleTrackerFactory),
+        (yam_path, WebpackYamFactory),
+        (manifest_path, WebpackManifestFactory),
+    ]:
+        loader.load(path)
+        assert loader._detected[path] == factory
+
+    # Later loads go straight to the detected factory.
+    monkeypatch.setattr(loader, "detect", None)
+    assert loader.load(yam_path).app
+
+
+def test_loader_register(tmpdir):
+    """Test registering a factory with its own sniffing predicate."""
+
+    class ListFactory(ManifestFactory):
+        def create(self, data):
+            manifest = self.create_manifest()
+            for path in data:
+                manifest.add(self.create_entry(path, [path]))
+            return manifest
+
+    path = join(tmpdir, "manifest.json")
+    with open(path, "w") as fp:
+        json.dump(["app.js"], fp)
+
+    loader = ManifestLoader()
+    pytest.raises(UnsupportedManifestError, loader.load, path)
+    loader.register(ListFactory, sniff=lambda data: isinstance(data, list))
+    assert loader.load(path)["app.js"]
+    # Registration does not leak to other loaders.
+    assert ListFactory not in ManifestLoader().types
+
+
+def test_decoder(bundletracker_path):
+    """Test loading manifests with a custom decoder."""
+    calls = []
+
+    def decoder(raw, schema=None):
+        calls.append(schema)
+        return json.loads(raw)
+
+    loader = ManifestLoader(decoder=decoder)
+    assert loader.load(bundletracker_path)["app.js"]
+    assert loader.load(bundletracker_path)["app.js"]
+    # The type is sniffed from the top-level keys, and the manifest is only
+    # decoded with the schema of its factory.
+    schema = WebpackBundleTrackerFactory.schema
+    if manifests.msgspec is None:
+        assert calls == [None, schema]
+    else:
+        assert calls == [schema, schema]
+
+    m = WebpackBundleTrackerFactory().load(bundletracker_path, decoder=decoder)
+    assert m["app.css"]
+
+
+def test_decode_json_schema(bundletracker_path):
+    """Test key-selective decoding."""
+    pytest.importorskip("msgspec")
+    with open(bundletracker_path, "rb") as fp:
+        raw = fp.read()
+    data = decode_json(raw, WebpackBundleTrackerFactory.schema)
+    assert set(data) == {"status", "chunks", "assets"}
+    for asset in data["assets"].values():
+        assert set(asset) == {"publicPath"}
+    # Data not shaped like the schema is fully decoded.
+    assert decode_json(
+        b'{"status": 1, "chunks": [], "assets": []}', {"assets": {"*": None}}
+    ) == {
+        "status": 1,
+        "chunks": [],
+        "assets": [],
+    }
+
+
+@pytest.mark.parametrize("inotify", [True, False])
+def test_wait_for_manifest(tmpdir, monkeypatch, inotify):
+    """Test waiting for a manifest to be built."""
+    if not inotify:
+        monkeypatch.setattr(manifests, "_watch", lambda filepath: None)
+    path = join(tmpdir, "manifest.json")
+
+    def build(delay=0.2):
+        time.sleep(delay)
+        with open(path, "w") as fp:
+            json.dump({"status": "building", "files": None}, fp)
+        time.sleep(delay)
+        with open(path, "w") as fp:
+            json.dump({"status": "built", "files": {"app": ["app.js"]}}, fp)
+
+    pytest.raises(ManifestTimeoutError, wait_for_manifest, path, timeout=0.1)
+
+    thread = threading.Thread(target=build)
+    thread.start()
+    start = time.monotonic()
+    assert list(wait_for_manifest(path, timeout=10).app) == ["app.js"]
+    assert time.monotonic() - start < 5
+    thread.join()
+
+    os.remove(path)
+    thread = threading.Thread(target=build)
+    thread.start()
+    manifest = asyncio.run(wait_for_manifest_async(path, timeout=10))
+    assert list(manifest.app) == ["app.js"]
+    thread.join()
+
+    # Cached loader waits on the first load.
+    os.remove(path)
+    thread = threading.Thread(target=build)
+    thread.start()
+    assert CachedManifestLoader(wait_timeout=10).load(path).app
+    thread.join()
+    pytest.raises(
+        ManifestTimeoutError,
+        CachedManifestLoader(wait_timeout=0).load,
+        join(tmpdir, "missing.json"),
+    )
+
+
+def test_manifest_memory():
+    """Memory benchmark of a manifest with 5,000 entries."""
+    vendor = "/static/dist/vendor.0123456789.js"
+    data = {
+        "status": "built",
+        "files": {
+            f"entry{i}": [f"/static/dist/entry{i}.abcdef0123.js", vendor]
+            for i in range(5000)
+        },
+    }
+    raw = json.dumps(data).encode("utf-8")
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        m = WebpackYamFactory().create(json.loads(raw))
+        gc.collect()
+        size, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # The shared chunk is held once, and entries have no __dict__.
+    assert len({id(list(e)[1]) for e in m}) == 1
+    assert not hasattr(m.entry0, "__dict__")
+    assert size / 5000 < 400
+
+
+def test_cached_loader_preload(yam_path, monkeypatch):
+    """Test loading manifests before forking."""
+    frozen = []
+    monkeypatch.setattr(gc, "freeze", lambda: frozen.append(True))
+    loader = CachedManifestLoader(check_interval=3600)
+    loader.preload(yam_path)
+    assert frozen
+    m = loader.load(yam_path)
+    assert m._html is not None
+    assert m.app._html is not None
+
+
+def test_cached_loader_preload_assets(tmpdir, monkeypatch):
+    """Test preloading a manifest listing files that cannot be rendered."""
+    monkeypatch.setattr(gc, "freeze", lambda: None)
+    path = join(tmpdir, "manifest.json")
+    with open(path, "w") as fp:
+        json.dump({"main.js": "main.1.js", "logo.png": "logo.1.png"}, fp)
+    loader = CachedManifestLoader(check_interval=3600)
+    loader.preload(path)
+    m = loader.load(path)
+    assert m["main.js"]._html is not None
+    assert list(m["logo.png"]) == ["logo.1.png"]
+    assert "logo.png" not in m.to_html()
+
+
+def test_compiled_manifest(tmpdir, vite_path):
+    """Test compiling and loading a binary manifest."""
+    path = join(tmpdir, "manifest.json")
+    with open(path, "w") as fp:
+        json.dump({"app.js": "app.1.js", "b.css": "b.1.css", "logo.png": "l.png"}, fp)
+
+    compiled_path = compile_manifest(path)
+    assert compiled_path == path + ".bin"
+
+    m = CompiledManifestLoader().load(path)
+    assert isinstance(m, CompiledManifest)
+    assert m["app.js"].render() == '<script src="app.1.js"></script>'
+    assert str(m["b.css"]) == '<link rel="stylesheet" href="b.1.css" />'
+    assert list(m["logo.png"]) == ["l.png"]
+    pytest.raises(UnsupportedExtensionError, m["logo.png"].render)
+    pytest.raises(KeyError, m.__getitem__, "missing.js")
+    pytest.raises(AttributeError, getattr, m, "missing")
+    assert {e.name for e in m} == {"app.js", "b.css", "logo.png"}
+    m.close()
+
+    # Stale compiled manifest: the JSON manifest is loaded instead.
+    with open(path, "w") as fp:
+        json.dump({"app.js": "app.2.js"}, fp)
+    m = CompiledManifestLoader().load(path)
+    assert not isinstance(m, CompiledManifest)
+    assert list(m["app.js"]) == ["app.2.js"]
+
+    # Only the compiled manifest was deployed.
+    compile_manifest(path)
+    os.remove(path)
+    m = CompiledManifestLoader().load(path)
+    assert list(m["app.js"]) == ["app.2.js"]
+    m.close()
+
+    # Entry options are kept.
+    path = compile_manifest(vite_path, join(tmpdir, "vite.json.bin"))
+    entry = CompiledManifest(path)["views/foo.js"]
+    assert entry.module
+    assert entry.imports == ManifestLoader().load(vite_path)["views/foo.js"].imports
+
+
+def test_manifest_set(tmpdir, yam_path, bundletracker_path):
+    """Test looking up entries in several manifests."""
+    path = join(tmpdir, "manifest.json")
+    with open(path, "w") as fp:
+        json.dump({"admin.js": "admin.1.js"}, fp)
+
+    manifests = ManifestSet(
+        [path, ("theme", yam_path), ("main", bundletracker_path)], check_interval=0
+    )
+    assert list(manifests["admin.js"]) == ["admin.1.js"]
+    assert list(manifests["theme:app"]) == ["rel/path/to/some_file.js"]
+    assert manifests["main:app.css"]
+    assert "app" not in manifests
+    assert len(list(manifests)) == 4
+    html = manifests.render_entries(["admin.js", "main:app.js"])
+    state = manifests._state
+
+    # Unchanged manifests are not reindexed.
+    manifests.refresh()
+    assert manifests._state is state
+
+    # A changed manifest is reloaded.
+    with open(path + ".tmp", "w") as fp:
+        json.dump({"admin.js": "admin.2.js"}, fp)
+    os.replace(path + ".tmp", path)
+    assert list(manifests["admin.js"]) == ["admin.2.js"]
+    # The index and the rendered fragments are replaced together.
+    index, rendered = manifests._state
+    assert index is not state[0] and not rendered
+    assert manifests.render_entries(["admin.js", "main:app.js"]) != html
+
+    # Conflicting entries are detected.
+    manifests = ManifestSet([yam_path, yam_path])
+    pytest.raises(ManifestConflictError, manifests.__getitem__, "app")
@@ -4,21 +4,43 @@
 
 """Module tests."""
 
+import importlib.metadata
+import importlib.util
 import json
 import os
+import subprocess
+import sys
+import time
 from os.path import exists, join
 from pathlib import Path
 
 import pytest
 
 from pywebpack import (
+    CachedManifestLoader,
     WebpackBundle,
     WebpackBundleProject,
     WebpackProject,
     WebpackTemplateProject,
+    helpers,
+)
+from pywebpack.budgets import check_budgets, entry_sizes
+from pywebpack.errors import BudgetExceededError, MergeConflictError
+from pywebpack.helpers import (
+    bundles_from_entry_point,
+    cached_entry_points,
+    compute_overrides,
+    max_version,
+    merge_all_deps,
+    merge_deps,
+)
+from pywebpack.semver import (
+    Version,
+    intersect_ranges,
+    max_versions,
+    parse_range,
+    parse_version,
 )
-from pywebpack.errors import MergeConflictError
-from pywebpack.helpers import max_version, merge_deps
 
 
 def json_from_file(filepath):
@@ -34,6 +56,69 @@ def test_version():
     assert __version__
 
 
+def _imported_modules(code):
+    """Get the modules imported by some code, with their import time (us)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        _self, _sep, rest = line.partition("|")
+        cumulative, _sep, name = rest.partition("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def test_lazy_imports():
+    """Test that using the manifests does not import the build machinery."""
+    startup = _imported_modules("pass")
+    imported = _imported_modules(
+        "import pywebpack; pywebpack.CachedManifestLoader; pywebpack.ManifestLoader"
+    )
+    assert "pywebpack.manifests" in imported
+    # Neither the build machinery nor the (slow to import) optional decoders.
+    for module in [
+        "pywebpack.project",
+        "pywebpack.storage",
+        "pywebpack.helpers",
+        "pynpm",
+        "shutil",
+        "msgspec",
+        "orjson",
+    ]:
+        assert module not in imported or module in startup
+    # Importing the package itself imports nothing else.
+    assert imported["pywebpack"] < imported["pywebpack.manifests"]
+
+    # All the public names are available.
+    import pywebpack
+
+    for name in pywebpack.__all__:
+        assert getattr(pywebpack, name)
+    assert set(pywebpack.__all__) <= set(dir(pywebpack))
+    with pytest.raises(AttributeError):
+        pywebpack.missing
+
+
+def test_lazy_submodules():
+    """Test accessing the submodules without importing them first."""
+    code = (
+        "import pywebpack; "
+        "assert 'manifests' in dir(pywebpack); "
+        "assert pywebpack.manifests.ManifestLoader; "
+        "assert pywebpack.helpers.bundles_from_entry_point; "
+        "assert pywebpack.project.WebpackProject; "
+        "assert pywebpack.errors.BudgetExceededError; "
+        "assert pywebpack.semver.parse_version"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
 @pytest.mark.parametrize(
     "v1,v2,expected",
     [
@@ -58,6 +143,38 @@ def test_version():
 )
 def test_max_version(v1, v2, expected):
     assert max_version(v1, v2) == expected
+    assert (parse_version(v1) <= parse_version(v2)) == (expected == v2)
+
+
+def test_max_versions():
+    assert max_versions(["~1.2.0", "^1.10.0", "1.9", "1.10.0-rc.1"]) == "^1.10.0"
+    # Same precedence: the first one is returned.
+    assert max_versions(["^1.0", "1.0.0+build"]) == "^1.0"
+    assert parse_version("^1.2") == Version(1, 2, 0)
+    assert str(parse_version("~1.2.3-beta.1+build")) == "1.2.3-beta.1"
+    with pytest.raises(ValueError):
+        parse_version("latest")
+
+
+def test_merge_deps_benchmark():
+    """Merging 10k dependency declarations parses each version string once."""
+    parse_version.cache_clear()
+    versions = [f"^1.{minor}.{patch}" for minor in range(10) for patch in range(10)]
+    declarations = [
+        {"dependencies": {f"pkg{i % 100}": versions[i % len(versions)]}}
+        for i in range(10000)
+    ]
+
+    start = time.perf_counter()
+    res = {}
+    for declaration in declarations:
+        merge_deps(res, declaration)
+    elapsed = time.perf_counter() - start
+
+    assert res["dependencies"]["pkg99"] == "^1.9.9"
+    assert parse_version.cache_info().misses == len(versions)
+    # Generous bound, it takes a few milliseconds.
+    assert elapsed < 2
 
 
 @pytest.mark.parametrize(
@@ -132,6 +249,276 @@ def test_merge_deps_incompat_major():
         )
 
 
+@pytest.mark.parametrize(
+    "spec,expected",
+    [
+        ("^1.2.3", ">=1.2.3 <2.0.0-0"),
+        ("^0.2.3", ">=0.2.3 <0.3.0-0"),
+        ("^0.0.3", ">=0.0.3 <0.0.4-0"),
+        ("^1.x", ">=1.0.0 <2.0.0-0"),
+        ("~1.2.3", ">=1.2.3 <1.3.0-0"),
+        ("~1", ">=1.0.0 <2.0.0-0"),
+        ("1.2", ">=1.2.0 <1.3.0-0"),
+        ("1.2.x", ">=1.2.0 <1.3.0-0"),
+        ("1.2.3", "1.2.3"),
+        ("=v1.2.3-beta.1", "1.2.3-beta.1"),
+        (">= 1.0 <2", ">=1.0.0 <2.0.0-0"),
+        (">1.2", ">=1.3.0"),
+        ("<=1.2", "<1.3.0-0"),
+        ("1.2.3 - 2.3", ">=1.2.3 <2.4.0-0"),
+        ("2.x || 1.x", ">=1.0.0 <2.0.0-0 || >=2.0.0 <3.0.0-0"),
+        ("*", "*"),
+    ],
+)
+def test_parse_range(spec, expected):
+    assert str(parse_range(spec)) == expected
+
+
+@pytest.mark.parametrize(
+    "specs,expected",
+    [
+        (["^1.2", "~1.4.0", ">=1.4.2"], ">=1.4.2 <1.5.0-0"),
+        (["^1.2.3", "1.x || 2.x"], "^1.2.3"),
+        (["^1.2.3", "1.5.0"], "1.5.0"),
+        (["1.0.0 - 1.5.0", "^1.2.3"], ">=1.2.3 <=1.5.0"),
+        (["^1.2", "^2"], None),
+        (["^3.3.1", "~3.2.1"], None),
+        (["<1.0.0", ">=1.0.0"], None),
+    ],
+)
+def test_intersect_ranges(specs, expected):
+    assert intersect_ranges(specs) == expected
+
+
+def test_merge_deps_intersect():
+    res = merge_deps(
+        {"dependencies": {"mypkg": "^1.2.0", "other": "~2.0.0"}},
+        {"dependencies": {"mypkg": "~1.4.0", "other": "~2.0.0"}},
+        intersect=True,
+    )
+    assert res["dependencies"] == {"mypkg": "~1.4.0", "other": "~2.0.0"}
+
+    with pytest.raises(MergeConflictError):
+        merge_deps(
+            {"dependencies": {"mypkg": "^3.3.1"}},
+            {"dependencies": {"mypkg": "~3.2.1"}},
+            intersect=True,
+        )
+
+    # Specs which are not ranges conflict unless they are equal.
+    for spec in ["github:foo/bar", "npm:pkg@^1", "file:../pkg", "workspace:*"]:
+        res = merge_deps(
+            {"dependencies": {"mypkg": spec}},
+            {"dependencies": {"mypkg": spec}},
+            intersect=True,
+        )
+        assert res["dependencies"] == {"mypkg": spec}
+        with pytest.raises(MergeConflictError):
+            merge_deps(
+                {"dependencies": {"mypkg": spec}},
+                {"dependencies": {"mypkg": "^1.0.0"}},
+                intersect=True,
+            )
+        merged, conflicts = merge_all_deps(
+            [
+                ("a", {"dependencies": {"mypkg": spec}}),
+                ("b", {"dependencies": {"mypkg": "latest"}}),
+            ],
+            intersect=True,
+            best_effort=True,
+        )
+        assert merged["dependencies"] == {"mypkg": "latest"}
+        assert [c.package for c in conflicts] == ["mypkg"]
+
+
+def test_merge_all_deps():
+    declarations = [
+        ("a", {"dependencies": {"pkg1": "^1.0.0", "pkg2": "^2.0.0"}}),
+        ("b", {"dependencies": {"pkg1": "^1.2.0", "pkg2": "^3.0.0"}}),
+        ("c", {"devDependencies": {"pkg3": "~1.0.0"}, "dependencies": {"pkg3": "1"}}),
+        ("d", {"devDependencies": {"pkg3": "~2.0.0"}}),
+    ]
+    with pytest.raises(MergeConflictError) as exc:
+        merge_all_deps(declarations)
+    # All conflicts are reported at once.
+    conflicts = exc.value.conflicts
+    assert [(c.dep_type, c.package) for c in conflicts] == [
+        ("dependencies", "pkg2"),
+        ("devDependencies", "pkg3"),
+    ]
+    assert conflicts[0].declarations == [("a", "^2.0.0"), ("b", "^3.0.0")]
+
+    merged, conflicts = merge_all_deps(declarations, best_effort=True)
+    assert len(conflicts) == 2
+    assert merged == {
+        "dependencies": {"pkg1": "^1.2.0", "pkg2": "^3.0.0", "pkg3": "1"},
+        "devDependencies": {"pkg3": "~2.0.0"},
+        "peerDependencies": {},
+    }
+
+
+def test_merge_all_deps_not_semver():
+    declarations = [
+        ("a", {"dependencies": {"x": "latest", "y": "github:u/y", "z": "latest"}}),
+        ("b", {"dependencies": {"x": "^1.0.0", "y": "github:u/y#v2", "z": "latest"}}),
+    ]
+    with pytest.raises(MergeConflictError) as exc:
+        merge_all_deps(declarations)
+    assert [c.package for c in exc.value.conflicts] == ["x", "y"]
+
+    merged, conflicts = merge_all_deps(declarations, best_effort=True)
+    assert len(conflicts) == 2
+    assert merged["dependencies"] == {
+        "x": "^1.0.0",
+        "y": "github:u/y#v2",
+        "z": "latest",
+    }
+
+
+def test_bundle_dependency_conflicts(builddir, bundledir, bundledir2, destdir):
+    """Test reporting all dependency conflicts of a bundle project."""
+    bundles = [
+        WebpackBundle(bundledir, dependencies={"lodash": "~4", "jquery": "^3"}),
+        WebpackBundle(bundledir2, dependencies={"lodash": "~3", "jquery": "^2"}),
+    ]
+    project = WebpackBundleProject(
+        working_dir=destdir, project_template_dir=builddir, bundles=bundles
+    )
+    with pytest.raises(MergeConflictError) as exc:
+        project.dependencies
+    assert len(exc.value.conflicts) == 2
+    assert bundledir2 in str(exc.value)
+
+    project = WebpackBundleProject(
+        working_dir=destdir,
+        project_template_dir=builddir,
+        bundles=bundles,
+        allow_dependency_conflicts=True,
+    )
+    assert project.dependencies["dependencies"] == {"lodash": "~4", "jquery": "^3"}
+    assert len(project.dependency_conflicts) == 2
+
+    # Conflicts with the source package.json are reported too.
+    bundles = [WebpackBundle(bundledir, devDependencies={"lodash": "^3.0.0"})]
+    project = WebpackBundleProject(
+        working_dir=destdir, project_template_dir=builddir, bundles=bundles
+    )
+    with pytest.raises(MergeConflictError) as exc:
+        project.package_json
+    assert exc.value.conflicts[0].package == "lodash"
+
+    project = WebpackBundleProject(
+        working_dir=destdir,
+        project_template_dir=builddir,
+        bundles=bundles,
+        allow_dependency_conflicts=True,
+    )
+    package_json = project.package_json
+    assert package_json["devDependencies"] == {"lodash": "~4"}
+    assert package_json["scripts"] == project.package_json_source["scripts"]
+    assert [c.package for c in project.dependency_conflicts] == ["lodash"]
+    assert project.package_json_source["devDependencies"] == {"lodash": "~4"}
+
+
+def test_compute_overrides():
+    deps = {
+        "dependencies": {"react": "^18.2.0", "lodash": "^4.17.0"},
+        "devDependencies": {"lodash": "~4", "webpack": "^5.0.0"},
+        "peerDependencies": {"jquery": "^3.0.0"},
+    }
+    # yarn resolutions apply to the direct dependencies too.
+    assert compute_overrides(deps) == {
+        "lodash": "^4.17.0",
+        "react": "^18.2.0",
+        "webpack": "^5.0.0",
+    }
+    # npm overrides of direct dependencies must reference them, and lodash
+    # cannot match both of its declarations.
+    assert compute_overrides(deps, reference=True) == {
+        "react": "$react",
+        "webpack": "$webpack",
+    }
+    assert compute_overrides(deps, ["react"]) == {"react": "^18.2.0"}
+    assert compute_overrides(deps, lambda pkg, v: v.startswith("~")) == {}
+
+
+def test_bundle_overrides(builddir, bundledir, destdir):
+    """Test generating npm overrides for the bundle dependencies."""
+    project = WebpackBundleProject(
+        working_dir=destdir,
+        project_template_dir=builddir,
+        bundles=[WebpackBundle(bundledir, dependencies={"react": "^18.2.0"})],
+        overrides_field="resolutions",
+    )
+    assert project.package_json["resolutions"] == {
+        "lodash": "~4",
+        "react": "^18.2.0",
+    }
+    project._overrides_field = "overrides"
+    assert project.package_json["overrides"] == {
+        "lodash": "$lodash",
+        "react": "$react",
+    }
+    with pytest.raises(ValueError):
+        WebpackBundleProject(destdir, builddir, overrides_field="pnpm")
+
+
+def test_bundle_budgets(builddir, bundledir, destdir, tmpdir):
+    """Test checking the performance budgets of the built entries."""
+    with open(join(tmpdir, "manifest.json"), "w") as fp:
+        json.dump({"app.js": "/app.js", "admin.js": "/admin.js"}, fp)
+    for name, content in [("app.js", "a" * 1000), ("admin.js", "b" * 100)]:
+        with open(join(tmpdir, name), "w") as fp:
+            fp.write(content)
+
+    project = WebpackBundleProject(
+        working_dir=destdir,
+        project_template_dir=builddir,
+        bundles=[
+            WebpackBundle(bundledir, budgets={"app.js": 500, "admin.js": 500}),
+        ],
+        budgets={"app.js": {"size": 2000, "gzip": 100}, "vendor.js": 10},
+    )
+    assert project.budgets["admin.js"] == 500
+
+    report = project.check_budgets(tmpdir)
+    assert report.ok
+    assert report.missing == ["vendor.js"]
+    assert [(r.entry, r.metric) for r in report.results] == [
+        ("admin.js", "size"),
+        ("app.js", "size"),
+        ("app.js", "gzip"),
+    ]
+    assert report.results[2].size < 100
+    assert "vendor.js: not found" in str(report)
+
+    # Precompressed files are used when present.
+    with open(join(tmpdir, "app.js.gz"), "wb") as fp:
+        fp.write(b"x" * 200)
+    with pytest.raises(BudgetExceededError) as exc:
+        project.check_budgets(tmpdir)
+    assert [str(r).split(":")[0] for r in exc.value.report.violations] == [
+        "app.js (gzip)"
+    ]
+    with pytest.warns(UserWarning):
+        project.check_budgets(tmpdir, fail=False)
+
+    # Only the entries with a budget are measured, and missing files fail.
+    with open(join(tmpdir, "manifest.json"), "w") as fp:
+        json.dump(
+            {"app.js": "/app.js", "admin.js": "/admin.js", "other.js": "/none.js"}, fp
+        )
+    report = check_budgets({"app.js": 2000}, tmpdir)
+    assert report.ok
+    assert [r.entry for r in report.results] == ["app.js"]
+    report = check_budgets({"app.js": 2000, "other.js": 10}, tmpdir)
+    assert not report.ok and not report.missing
+    assert report.missing_files == {"other.js": ["/none.js"]}
+    assert "other.js: missing file /none.js" in str(report)
+    assert list(entry_sizes(tmpdir, names=["app.js"])) == ["app.js"]
+    pytest.raises(FileNotFoundError, entry_sizes, tmpdir)
+
+
 def test_project(simpleprj):
     """Test extension initialization."""
     project = WebpackProject(simpleprj)
@@ -171,6 +558,68 @@ def test_project_failed_build(simpleprj):
         project.buildall()
 
 
+def test_publish(simpleprj, tmpdir):
+    """Test atomic publishing of the build output."""
+    project = WebpackProject(simpleprj)
+    output_dir = join(tmpdir, "dist")
+    publish_dir = join(tmpdir, "published")
+    current = join(publish_dir, "current", "manifest.json")
+    loader = CachedManifestLoader(check_interval=0)
+
+    def build(n, files=None, prefix="/static/"):
+        os.makedirs(output_dir, exist_ok=True)
+        with open(join(output_dir, "manifest.json"), "w") as fp:
+            json.dump({"app.js": f"{prefix}app.{n}.js"}, fp)
+        for name in [f"app.{n}.js"] if files is None else files:
+            with open(join(output_dir, name), "w") as fp:
+                fp.write(str(n))
+
+    build(1)
+    v1 = project.publish(output_dir, publish_dir, public_path="/static/", build=False)
+    assert os.readlink(join(publish_dir, "current")) == os.path.basename(v1)
+    assert list(loader.load(current)["app.js"]) == ["/static/app.1.js"]
+
+    # Manifest paths are resolved from the URL path by default.
+    time.sleep(0.01)
+    build(2, prefix="https://cdn.example.org/")
+    v2 = project.publish(output_dir, publish_dir, version="v2", build=False)
+    assert v2 == join(publish_dir, "v2")
+    assert list(loader.load(current)["app.js"]) == ["https://cdn.example.org/app.2.js"]
+    assert exists(v1)
+
+    # Incomplete build: nothing is published.
+    build(3, files=[])
+    with pytest.raises(RuntimeError):
+        project.publish(output_dir, publish_dir, public_path="/static/", build=False)
+    assert list(loader.load(current)["app.js"]) == ["https://cdn.example.org/app.2.js"]
+    assert sorted(os.listdir(publish_dir)) == sorted(
+        ["current", "v2", os.path.basename(v1)]
+    )
+
+    # Old versions are garbage collected.
+    time.sleep(0.01)
+    build(4)
+    v4 = project.publish(
+        output_dir, publish_dir, keep=2, public_path="/static/", build=False
+    )
+    assert sorted(os.listdir(publish_dir)) == sorted(
+        ["current", "v2", os.path.basename(v4)]
+    )
+    assert exists(join(v4, "app.4.js"))
+
+    # Assets which are not content-hashed are published, even if the
+    # manifest did not change.
+    with open(join(output_dir, "logo.svg"), "w") as fp:
+        fp.write("<svg/>")
+    v5 = project.publish(output_dir, publish_dir, public_path="/static/", build=False)
+    assert v5 != v4
+    assert exists(join(v5, "logo.svg"))
+    assert (
+        project.publish(output_dir, publish_dir, public_path="/static/", build=False)
+        == v5
+    )
+
+
 def test_templateproject_create(templatedir, destdir):
     """Test template project creation."""
     project = WebpackTemplateProject(destdir, project_template_dir=templatedir)
@@ -375,3 +824,190 @@ def test_bundle_copy_path_validation(builddir, bundledir, destdir):
             allowed_copy_paths=[builddir],
         )
         project.create()
+
+
+def test_bundle_config_cache(builddir, bundledir, destdir):
+    """Test that the composed config is cached and does not mutate input."""
+    base_config = {"test": True}
+    bundle = WebpackBundle(bundledir, entry={"app": "./index.js"})
+    project = WebpackBundleProject(
+        working_dir=destdir,
+        project_template_dir=builddir,
+        bundles=[bundle],
+        config=base_config,
+    )
+
+    config = project.config
+    assert config["entry"] == {"app": "./index.js"}
+    assert base_config == {"test": True}
+
+    # Modifying the returned config does not affect the cached one.
+    config["entry"]["other"] = "./other.js"
+    assert project.config["entry"] == {"app": "./index.js"}
+
+    config_hash = project.config_hash
+    assert config_hash == project.config_hash
+    assert project._config_cache[0] == project.config_fingerprint
+
+    # Changing the user-supplied config invalidates the cache.
+    base_config["test"] = False
+    assert project.config["test"] is False
+    assert project.config_hash != config_hash
+
+    # So do the entries of the bundles.
+    bundle.entry["other"] = "./other.js"
+    assert project.config["entry"] == {"app": "./index.js", "other": "./other.js"}
+    assert project.entry == project.config["entry"]
+
+
+def test_bundle_execute_copy(builddir, bundledir, destdir, tmpdir):
+    """Test executing copy instructions from Python."""
+    srcdir = join(tmpdir, "assets")
+    os.makedirs(join(srcdir, "sub"))
+    for p in ["a.txt", "sub/b.txt"]:
+        with open(join(srcdir, p), "w") as fp:
+            fp.write(p)
+
+    copy = [
+        {"from": srcdir, "to": "./static/"},
+        {"from": join(srcdir, "sub", "b.txt"), "to": "./static/sub/"},
+    ]
+    project = WebpackBundleProject(
+        working_dir=destdir,
+        project_template_dir=builddir,
+        bundles=[
+            WebpackBundle(bundledir, copy=copy),
+            # Duplicated instructions are coalesced.
+            WebpackBundle(bundledir, copy=copy[:1]),
+        ],
+        allowed_copy_paths=[tmpdir],
+        execute_copy=True,
+        copy_link=True,
+    )
+    assert project.copy == copy
+    # Copy instructions are not passed on to webpack.
+    assert project.config["copy"] == []
+
+    project.create()
+    assert json_from_file(project.config_path)["copy"] == []
+    # The copy is executed on build, after the installation.
+    assert not exists(join(project.project_path, "static"))
+    project.copy_assets()
+    for p in ["a.txt", "sub/b.txt"]:
+        dst = join(project.project_path, "static", p)
+        assert os.path.samefile(dst, join(srcdir, p))
+
+    # Conflicting sources for the same destination are refused.
+    conflicting = {"from": join(srcdir, "a.txt"), "to": "./static/sub/b.txt"}
+    project._bundles = [WebpackBundle(bundledir, copy=[copy[0], conflicting])]
+    with pytest.raises(RuntimeError):
+        project.copy_assets()
+
+    # Like copy-webpack-plugin, a destination without extension is a
+    # directory, and globs are refused.
+    project._bundles = [
+        WebpackBundle(bundledir, copy=[{"from": join(srcdir, "a.txt"), "to": "./v1"}])
+    ]
+    project.copy_assets()
+    assert exists(join(project.project_path, "v1", "a.txt"))
+    glob = {"from": join(srcdir, "*.txt"), "to": "./v2"}
+    project._bundles = [WebpackBundle(bundledir, copy=[glob])]
+    with pytest.raises(RuntimeError):
+        project.copy_assets()
+
+
+def test_bundle_execute_copy_after_install(builddir, bundledir, destdir, tmpdir):
+    """Test copying from packages installed by npm."""
+    calls = []
+
+    class NPMPackage(object):
+        package_json_path = join(destdir, "package.json")
+        package_json = {"scripts": {"build": "webpack"}}
+
+        def install(self):
+            calls.append("install")
+            os.makedirs(join(destdir, "node_modules", "skin"))
+            with open(join(destdir, "node_modules", "skin", "skin.css"), "w") as fp:
+                fp.write("body {}")
+            return 0
+
+        def run_script(self, name):
+            calls.append(name)
+            assert exists(join(destdir, "static", "skin", "skin.css"))
+            return 0
+
+    project = WebpackBundleProject(
+        working_dir=destdir,
+        project_template_dir=builddir,
+        bundles=[
+            WebpackBundle(
+                bundledir,
+                copy=[{"from": "node_modules/skin", "to": "static/skin"}],
+            ),
+        ],
+        execute_copy=True,
+    )
+    project._npmpkg = NPMPackage()
+    project.buildall()
+    assert calls == ["install", "build"]
+
+
+def test_cached_entry_points(tmpdir, monkeypatch):
+    """Test the on-disk cache of entry points."""
+    eps = [importlib.metadata.EntryPoint("b", "mod:b", "grp")]
+    monkeypatch.setattr(helpers, "entry_points", lambda group: eps)
+
+    assert cached_entry_points("grp", tmpdir) == eps
+    assert exists(join(tmpdir, "entry_points.json"))
+
+    # Cached: the metadata is not scanned again.
+    monkeypatch.setattr(helpers, "entry_points", lambda group: [])
+    assert cached_entry_points("grp", tmpdir) == eps
+
+    # Installed distributions changed: the metadata is scanned again.
+    monkeypatch.setattr(helpers, "_sys_path_fingerprint", lambda: "changed")
+    assert cached_entry_points("grp", tmpdir) == []
+
+
+def test_declarative_bundle(tmpdir, monkeypatch):
+    """Test loading a declarative bundle without importing its package."""
+    pkgdir = join(tmpdir, "mypkg", "sub")
+    os.makedirs(pkgdir)
+    for d in [join(tmpdir, "mypkg"), pkgdir]:
+        with open(join(d, "__init__.py"), "w") as fp:
+            fp.write("raise RuntimeError('Package must not be imported.')")
+    with open(join(pkgdir, "webpack.json"), "w") as fp:
+        json.dump(
+            {
+                "path": "assets",
+                "entry": {"mypkg": "./js/mypkg.js"},
+                "dependencies": {"jquery": "^3.2.1"},
+            },
+            fp,
+        )
+    monkeypatch.syspath_prepend(tmpdir)
+    eps = [importlib.metadata.EntryPoint("mypkg", "mypkg.sub:webpack.json", "grp")]
+    monkeypatch.setattr(helpers, "entry_points", lambda group: eps)
+
+    (bundle,) = bundles_from_entry_point("grp")
+    assert bundle.path == join(pkgdir, "assets")
+    assert bundle.entry == {"mypkg": "./js/mypkg.js"}
+    assert bundle.dependencies["dependencies"] == {"jquery": "^3.2.1"}
+
+    # Packages only found by a meta path finder (e.g. editable installs).
+    class EditableFinder(object):
+        @classmethod
+        def find_spec(cls, name, path=None, target=None):
+            if name == "editablepkg":
+                return importlib.util.spec_from_file_location(
+                    name,
+                    join(tmpdir, "mypkg", "__init__.py"),
+                    submodule_search_locations=[join(tmpdir, "mypkg")],
+                )
+            return None
+
+    monkeypatch.setattr(sys, "meta_path", [EditableFinder] + sys.meta_path)
+    eps = [importlib.metadata.EntryPoint("e", "editablepkg.sub:webpack.json", "grp")]
+    monkeypatch.setattr(helpers, "entry_points", lambda group: eps)
+    (bundle,) = bundles_from_entry_point("grp")
+    assert bundle.path == join(pkgdir, "assets")
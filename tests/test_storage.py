@@ -4,10 +4,16 @@
 """Storage class test."""
 
 import time
-from os import remove, symlink, utime
+from os import makedirs, remove, stat, symlink, utime
 from os.path import exists, getmtime, islink, join, realpath
 
-from pywebpack.storage import FileStorage, LinkStorage, iter_files, iter_paths
+from pywebpack.storage import (
+    FileStorage,
+    LinkStorage,
+    ParallelFileStorage,
+    iter_files,
+    iter_paths,
+)
 
 
 def test_iterfiles(sourcedir):
@@ -101,3 +107,39 @@ def test_linkstorage(sourcedir, tmpdir):
     fs.run()
     assert islink(fdst)
     assert realpath(fdst) == realpath(fsrc)
+
+
+def test_parallelfilestorage(tmpdir):
+    """Test parallel file storage copy."""
+    srcdir, dstdir = join(tmpdir, "src"), join(tmpdir, "dst")
+    makedirs(join(srcdir, "sub"))
+    for name in ["a.js", "sub/b.js"]:
+        with open(join(srcdir, name), "w") as fp:
+            fp.write(name)
+    fsrc, fdst = join(srcdir, "a.js"), join(dstdir, "a.js")
+
+    fs = ParallelFileStorage(srcdir, dstdir, max_workers=2, checksum=True)
+
+    # Files are copied
+    fs.run()
+    assert exists(fdst)
+    assert exists(join(dstdir, "sub/b.js"))
+
+    # File is *not* copied (same content, only the mtime changed)
+    inode = stat(fdst).st_ino
+    utime(fsrc, (time.time() + 10, time.time() + 10))
+    fs.run()
+    assert stat(fdst).st_ino == inode
+
+    # File is copied (content changed)
+    with open(fsrc, "w") as fp:
+        fp.write("changed")
+    fs.run()
+    with open(fdst) as fp:
+        assert fp.read() == "changed"
+
+    # Files are hardlinked
+    ParallelFileStorage(srcdir, dstdir, link=True).run(force=["sub/b.js"])
+    assert (
+        stat(join(dstdir, "sub/b.js")).st_ino == stat(join(srcdir, "sub/b.js")).st_ino
+    )